@@ -0,0 +1,81 @@
+#!/usr/bin/python
+"""
+Micro-benchmark of the vectorized boundary cleanup against the original
+row by row loop. The boundary layer is tiled to give a realistic size and
+the outputs of both are checked to be identical.
+
+    python benchmarks/bench_boundary.py --tiles 500
+
+"""
+
+import argparse
+import timeit
+from os.path import dirname, join
+
+import geopandas
+import numpy
+from geopandas.testing import assert_geodataframe_equal
+from pandas import concat
+from shapely.validation import make_valid
+
+from hdx.scraper.ibtracs.ibtracs import _CRS, clean_global_boundary
+
+_BOUNDARY = join(
+    dirname(__file__),
+    "..",
+    "tests",
+    "fixtures",
+    "input",
+    "wrl_polbnda_int_1m_uncs.geojson",
+)
+
+
+def iterrows_cleanup(lyr: geopandas.GeoDataFrame) -> geopandas.GeoDataFrame:
+    lyr = lyr.replace({numpy.nan: None})
+    lyr = lyr.to_crs(crs=_CRS)
+    for i, row in lyr.iterrows():
+        if not lyr.geometry[i].is_valid:
+            lyr.loc[i, "geometry"] = make_valid(lyr.geometry[i])
+        if row["STATUS"] and row["STATUS"][:4] == "Adm.":
+            lyr.loc[i, "ISO_3"] = row["Color_Code"]
+    lyr = lyr.drop(
+        [f for f in lyr.columns if f.lower() not in ["iso_3", "geometry"]],
+        axis=1,
+    )
+    return lyr
+
+
+def tile_layer(lyr: geopandas.GeoDataFrame, tiles: int) -> geopandas.GeoDataFrame:
+    lyr = concat([lyr] * tiles, ignore_index=True)
+    # Exercise both the administered area substitution and validity repair
+    lyr.loc[1::3, "STATUS"] = "Adm. by CUB"
+    lyr.loc[2::3, "STATUS"] = None
+    bowtie = geopandas.GeoSeries.from_wkt(
+        ["POLYGON ((-80 20, -78 22, -78 20, -80 22, -80 20))"], crs=lyr.crs
+    )[0]
+    lyr.loc[::5, "geometry"] = bowtie
+    return lyr
+
+
+def main(tiles: int, number: int) -> None:
+    lyr = tile_layer(geopandas.read_file(_BOUNDARY), tiles)
+    assert_geodataframe_equal(iterrows_cleanup(lyr), clean_global_boundary(lyr))
+    print(f"Boundary rows: {len(lyr)}, output identical")
+    results = {}
+    for name, function in (
+        ("iterrows", iterrows_cleanup),
+        ("vectorized", clean_global_boundary),
+    ):
+        results[name] = min(
+            timeit.repeat(lambda: function(lyr), number=number, repeat=3)
+        )
+        print(f"{name}: {results[name] / number:.4f}s per run")
+    print(f"Speedup: {results['iterrows'] / results['vectorized']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tiles", type=int, default=100)
+    parser.add_argument("--number", type=int, default=1)
+    args = parser.parse_args()
+    main(args.tiles, args.number)
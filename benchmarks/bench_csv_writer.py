@@ -0,0 +1,81 @@
+#!/usr/bin/python
+"""
+Benchmark of writing the IBTrACS CSV resource with the chunked DataFrame
+writer against the original path of converting every row to a dictionary
+and passing them to Dataset.generate_resource. The world CSV fixture is
+tiled to give a realistic size, the outputs are checked to be byte
+identical and wall time and peak traced memory of each are reported.
+
+    python benchmarks/bench_csv_writer.py --tiles 30
+
+"""
+
+import argparse
+import filecmp
+import time
+import tracemalloc
+from os.path import dirname, join
+
+from hdx.api.configuration import Configuration
+from hdx.data.dataset import Dataset
+from hdx.utilities.path import temp_dir
+from pandas import concat, read_csv
+
+from hdx.scraper.ibtracs.writers import write_csv
+
+_CSV = join(dirname(__file__), "..", "tests", "fixtures", "ibtracs_ALL_list_v04r01.csv")
+
+
+def dict_rows_writer(ibtracs_df, folder, filename):
+    ibtracs_dict = ibtracs_df.apply(lambda x: x.to_dict(), axis=1)
+    dataset = Dataset({"name": "benchmark"})
+    dataset.generate_resource(
+        folder=folder,
+        filename=filename,
+        rows=ibtracs_dict,
+        resourcedata={"name": filename},
+        headers=list(ibtracs_dict[0].keys()),
+        encoding="utf-8",
+    )
+
+
+def chunked_writer(ibtracs_df, folder, filename):
+    write_csv(ibtracs_df, join(folder, filename))
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(tiles: int) -> None:
+    Configuration._create(hdx_read_only=True, hdx_site="prod", user_agent="test")
+    ibtracs_df = read_csv(_CSV, keep_default_na=False)
+    ibtracs_df = concat([ibtracs_df[0:1]] + [ibtracs_df[1:]] * tiles, ignore_index=True)
+    print(f"Rows: {len(ibtracs_df)}")
+    with temp_dir("bench_csv_writer") as folder:
+        results = {}
+        for name, function in (
+            ("dict rows", dict_rows_writer),
+            ("chunked", chunked_writer),
+        ):
+            elapsed, peak = measure(function, ibtracs_df, folder, f"{name}.csv")
+            results[name] = elapsed
+            print(f"{name}: {elapsed:.2f}s, peak {peak / 1048576:.1f}MB")
+        assert filecmp.cmp(
+            join(folder, "dict rows.csv"), join(folder, "chunked.csv"), shallow=False
+        )
+        print("Output identical")
+        print(f"Speedup: {results['dict rows'] / results['chunked']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tiles", type=int, default=10)
+    args = parser.parse_args()
+    main(args.tiles)
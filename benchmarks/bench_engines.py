@@ -0,0 +1,129 @@
+#!/usr/bin/python
+"""
+Comparison of the country engines on synthetic storm tracks. The overlay,
+distance and haversine engines assign the same tracks to the countries of a
+boundary layer and the speed of each and the storm to country pairs on
+which the distance and haversine engines differ from overlay are reported.
+Overlay and distance buffer in the Mollweide projection, haversine measures
+great-circle distance, so they differ where the projection distorts
+distance. Differences are reported by the highest latitude reached by the
+storm. Only countries that overlay
+processes are compared. By default the boundary layer is the test fixture;
+pass the UN boundary GeoJSON with --boundary to use all countries.
+
+    python benchmarks/bench_engines.py --rows 200000 --output engines.json
+
+"""
+
+import argparse
+import json
+import time
+from os.path import dirname, join
+from typing import Dict, Optional, Set, Tuple
+
+import geopandas
+import numpy
+from synthetic import generate_rows
+
+from hdx.scraper.ibtracs.ibtracs import _CRS, read_global_boundary
+from hdx.scraper.ibtracs.membership import get_membership, include_country
+
+_BOUNDARY = join(
+    dirname(__file__),
+    "..",
+    "tests",
+    "fixtures",
+    "input",
+    "wrl_polbnda_int_1m_uncs.geojson",
+)
+_ENGINES = {
+    # Engine and CRS of its inputs
+    "overlay": _CRS,
+    "distance": _CRS,
+    "haversine": "EPSG:4326",
+}
+_BANDS = ((0, 30), (30, 60), (60, 90))
+
+
+def get_pairs(membership: Dict[str, Set[str]]) -> Set[Tuple[str, str]]:
+    return {
+        (sid, iso3)
+        for sid, iso3s in membership.items()
+        for iso3 in iso3s
+        if include_country(iso3)
+    }
+
+
+def get_bands(pairs: Set[Tuple[str, str]], max_lats: Dict[str, float]) -> Dict:
+    bands = {f"{low}-{high}": 0 for low, high in _BANDS}
+    for sid, _ in pairs:
+        for low, high in _BANDS:
+            if low <= max_lats[sid] <= high:
+                bands[f"{low}-{high}"] += 1
+                break
+    return bands
+
+
+def main(boundary: str, rows: int, distance: float, output: Optional[str]) -> None:
+    df = generate_rows(rows)
+    lons = df["LON"].astype(float).to_numpy()
+    lats = df["LAT"].astype(float).to_numpy()
+    max_lats = (
+        df.assign(ABS_LAT=numpy.abs(lats)).groupby("SID")["ABS_LAT"].max().to_dict()
+    )
+    points = geopandas.GeoDataFrame(
+        df[["SID"]], geometry=geopandas.points_from_xy(lons, lats), crs="EPSG:4326"
+    )
+    print(f"Rows: {len(points)}, storms: {len(max_lats)}")
+    results = {"rows": len(points), "storms": len(max_lats), "engines": {}}
+    memberships = {}
+    for engine, crs in _ENGINES.items():
+        boundaries = read_global_boundary(boundary, crs)
+        engine_points = points if crs == "EPSG:4326" else points.to_crs(crs=crs)
+        start = time.perf_counter()
+        memberships[engine] = get_membership(
+            engine_points, boundaries, distance, engine
+        )
+        seconds = time.perf_counter() - start
+        results["engines"][engine] = {"seconds": round(seconds, 3)}
+        print(f"{engine}: {seconds:.2f}s")
+    overlay = get_pairs(memberships["overlay"])
+    for engine in ("distance", "haversine"):
+        pairs = get_pairs(memberships[engine])
+        only_overlay = overlay - pairs
+        only_engine = pairs - overlay
+        results["engines"][engine].update(
+            {
+                "pairs": len(pairs),
+                "same_as_overlay": len(pairs & overlay),
+                "only_overlay": get_bands(only_overlay, max_lats),
+                "only_engine": get_bands(only_engine, max_lats),
+            }
+        )
+        print(
+            f"{engine} vs overlay: {len(pairs & overlay)} of {len(overlay)} pairs "
+            f"the same, {len(only_overlay)} only in overlay, "
+            f"{len(only_engine)} only in {engine}"
+        )
+        for low, high in _BANDS:
+            band = f"{low}-{high}"
+            print(
+                f"  storms reaching {band} degrees: "
+                f"{results['engines'][engine]['only_overlay'][band]} only in overlay, "
+                f"{results['engines'][engine]['only_engine'][band]} only in {engine}"
+            )
+    results["engines"]["overlay"]["pairs"] = len(overlay)
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--boundary", default=_BOUNDARY)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--distance", type=float, default=2000000)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    main(args.boundary, args.rows, args.distance, args.output)
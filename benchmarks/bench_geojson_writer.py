@@ -0,0 +1,109 @@
+#!/usr/bin/python
+"""
+Benchmark of writing the IBTrACS lines GeoJSON resource with the streaming
+writer against GDAL's GeoJSON driver. The lines shapefile fixture is tiled
+to give a realistic size, the outputs are validated as equivalent and wall
+time and peak traced memory of each are reported. Several copies are then
+written concurrently with a forked process pool as generate_datasets does
+for country files.
+
+    python benchmarks/bench_geojson_writer.py --tiles 30 --workers 4
+
+"""
+
+import argparse
+import time
+import tracemalloc
+from multiprocessing import get_context
+from os.path import dirname, join
+
+from geopandas import GeoDataFrame
+from hdx.utilities.path import temp_dir
+from pandas import concat
+
+from hdx.scraper.ibtracs.ingest import read_ibtracs_lines
+from hdx.scraper.ibtracs.writers import validate_geojson, write_geojson
+
+_LINES = join(
+    dirname(__file__),
+    "..",
+    "tests",
+    "fixtures",
+    "input",
+    "shapefile-ibtracs-all-list-v04r01-lines.zip",
+)
+
+_COLUMNS = [
+    "SID",
+    "ISO_TIME",
+    "BASIN",
+    "SUBBASIN",
+    "NATURE",
+    "NUMBER",
+    "LAT",
+    "LON",
+    "WMO_WIND",
+    "WMO_PRES",
+]
+
+_lines_df = None
+
+
+def ogr_writer(lines_df, path):
+    lines_df.to_file(path, driver="GeoJSON")
+
+
+def measure(function, *args):
+    # Tracing slows pure Python code far more than GDAL so time and peak
+    # memory are measured in separate runs
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def _write_copy(path):
+    write_geojson(_lines_df, path)
+    return path
+
+
+def main(tiles: int, workers: int) -> None:
+    global _lines_df
+    lines_df = read_ibtracs_lines(
+        _LINES, "IBTrACS.ALL.list.v04r01.lines.shp", _COLUMNS, {}
+    )
+    lines_df = GeoDataFrame(concat([lines_df] * tiles, ignore_index=True))
+    print(f"Features: {len(lines_df)}")
+    with temp_dir("bench_geojson_writer") as folder:
+        results = {}
+        for name, function in (
+            ("ogr", ogr_writer),
+            ("streaming", write_geojson),
+        ):
+            path = join(folder, f"{name}.geojson")
+            elapsed, peak = measure(function, lines_df, path)
+            results[name] = elapsed
+            print(f"{name}: {elapsed:.2f}s, peak {peak / 1048576:.1f}MB")
+        validate_geojson(join(folder, "ogr.geojson"), join(folder, "streaming.geojson"))
+        print("Output equivalent")
+        print(f"Speedup: {results['ogr'] / results['streaming']:.1f}x")
+
+        _lines_df = lines_df
+        paths = [join(folder, f"copy{i}.geojson") for i in range(workers)]
+        start = time.perf_counter()
+        with get_context("fork").Pool(workers) as pool:
+            list(pool.imap(_write_copy, paths))
+        elapsed = time.perf_counter() - start
+        print(f"{workers} files concurrently: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tiles", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    main(args.tiles, args.workers)
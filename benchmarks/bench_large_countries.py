@@ -0,0 +1,126 @@
+#!/usr/bin/python
+"""
+Benchmark of assigning storms to the largest countries (ATA, CAN, RUS and
+USA) with the distance engine, checking that each finishes within a fixed
+time budget. By default the countries are synthetic shapes with detailed
+outlines of about the size and vertex count of the real ones and storm
+track points are random walks. Pass the UN boundary GeoJSON with --boundary to use
+the real countries. With --compare, the time to buffer each country as the
+strtree engine does is also reported.
+
+    python benchmarks/bench_large_countries.py --points 700000 --budget 60
+
+"""
+
+import argparse
+import time
+
+import geopandas
+import numpy
+from shapely import Polygon
+from shapely.errors import GEOSException
+
+from hdx.scraper.ibtracs.ibtracs import _CRS, read_global_boundary
+from hdx.scraper.ibtracs.membership import distance_membership
+
+_DISTANCE = 2000000
+_LARGE_COUNTRIES = {
+    # Centre longitude and latitude and radii in degrees
+    "CAN": (-100, 62, 40, 12),
+    "RUS": (100, 62, 75, 12),
+    "USA": (-98, 39, 25, 10),
+}
+
+
+def jagged(values: numpy.ndarray, rng: numpy.random.Generator) -> numpy.ndarray:
+    return values * (1 + 0.05 * rng.standard_normal(len(values)))
+
+
+def synthetic_countries(vertices: int, seed: int) -> geopandas.GeoDataFrame:
+    rng = numpy.random.default_rng(seed)
+    angles = numpy.linspace(0, 2 * numpy.pi, vertices, endpoint=False)
+    iso3s = []
+    geometries = []
+    for iso3, (lon, lat, lon_radius, lat_radius) in _LARGE_COUNTRIES.items():
+        radii = jagged(numpy.ones(vertices), rng)
+        lons = lon + lon_radius * radii * numpy.cos(angles)
+        lats = lat + lat_radius * radii * numpy.sin(angles)
+        iso3s.append(iso3)
+        geometries.append(Polygon(numpy.column_stack((lons, lats))))
+    lons = numpy.linspace(180, -180, vertices)
+    lats = numpy.clip(-70 + 3 * rng.standard_normal(vertices), -85, -60)
+    coordinates = numpy.column_stack((lons, lats))
+    coordinates = numpy.vstack((coordinates, [[-180, -90], [180, -90]]))
+    iso3s.append("ATA")
+    geometries.append(Polygon(coordinates))
+    countries = geopandas.GeoDataFrame(
+        {"ISO_3": iso3s}, geometry=geometries, crs="EPSG:4326"
+    )
+    return countries.to_crs(crs=_CRS)
+
+
+def random_tracks(number: int, seed: int) -> geopandas.GeoDataFrame:
+    # Random walks of 50 points from random starting points
+    rng = numpy.random.default_rng(seed)
+    sids = numpy.arange(number) // 50
+    starts = numpy.flatnonzero(numpy.diff(sids, prepend=-1))
+    steps = rng.normal(0, 0.5, (number, 2))
+    steps[starts, 0] = rng.uniform(-180, 180, len(starts))
+    steps[starts, 1] = rng.uniform(-60, 60, len(starts))
+    walks = numpy.cumsum(steps, axis=0)
+    walks -= numpy.repeat(
+        walks[starts] - steps[starts], numpy.diff(starts, append=number), axis=0
+    )
+    lons = (walks[:, 0] + 180) % 360 - 180
+    lats = numpy.clip(walks[:, 1], -80, 80)
+    points = geopandas.GeoDataFrame(
+        {"SID": sids.astype(str)},
+        geometry=geopandas.points_from_xy(lons, lats),
+        crs="EPSG:4326",
+    )
+    return points.to_crs(crs=_CRS)
+
+
+def main(
+    boundary: str, points: int, vertices: int, budget: float, compare: bool
+) -> None:
+    if boundary:
+        countries = read_global_boundary(boundary)
+        countries = countries[countries["ISO_3"].isin(["ATA", *_LARGE_COUNTRIES])]
+    else:
+        countries = synthetic_countries(vertices, 0)
+    points_df = random_tracks(points, 1)
+    print(f"Points: {len(points_df)}")
+    over_budget = []
+    for iso3, country in countries.groupby("ISO_3", sort=False):
+        vertex_count = country.geometry.count_coordinates().sum()
+        start = time.perf_counter()
+        membership = distance_membership(points_df, country, _DISTANCE)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{iso3}: {vertex_count} vertices, {len(membership)} storms, {elapsed:.2f}s"
+        )
+        if elapsed > budget:
+            over_budget.append(iso3)
+        if compare:
+            start = time.perf_counter()
+            try:
+                country.geometry.buffer(_DISTANCE)
+                result = "done"
+            except (GEOSException, MemoryError) as ex:
+                result = f"failed ({ex})"
+            print(f"{iso3}: buffering {result} in {time.perf_counter() - start:.2f}s")
+    if over_budget:
+        raise SystemExit(f"Over budget of {budget}s: {', '.join(over_budget)}")
+    print(f"All countries within budget of {budget}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--boundary", default=None)
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--vertices", type=int, default=100000)
+    parser.add_argument("--budget", type=float, default=60)
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+    main(args.boundary, args.points, args.vertices, args.budget, args.compare)
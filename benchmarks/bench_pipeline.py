@@ -0,0 +1,188 @@
+#!/usr/bin/python
+"""
+End to end benchmark of the scraper on synthetic IBTrACS inputs of
+increasing size. For each size, inputs are generated with synthetic.py and
+get_data, process_countries and generate_datasets are each timed with their
+peak RSS measured separately. All HDX calls are stubbed locally. Results are
+written as JSON and can be compared with those of another commit.
+
+    python benchmarks/bench_pipeline.py --rows 10000 100000 1000000 \\
+        --output results.json --baseline results_main.json
+
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime, timezone
+from os.path import dirname, join
+from typing import Dict, Optional
+
+from hdx.api.configuration import Configuration
+from hdx.api.locations import Locations
+from hdx.data.dataset import Dataset
+from hdx.data.resource import Resource
+from hdx.data.vocabulary import Vocabulary
+from hdx.location.country import Country
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+from synthetic import generate
+
+from hdx.scraper.ibtracs.ibtracs import Ibtracs
+from hdx.scraper.ibtracs.instrumentation import read_peak_rss, reset_peak_rss
+
+_ROOT = join(dirname(__file__), "..")
+_CONFIG = join(_ROOT, "src", "hdx", "scraper", "ibtracs", "config")
+
+
+def stub_hdx(input_folder: str) -> Configuration:
+    Configuration._create(
+        hdx_read_only=True,
+        hdx_site="prod",
+        user_agent="benchmark",
+        project_config_yaml=join(_CONFIG, "project_configuration.yaml"),
+    )
+    configuration = Configuration.read()
+    countries = Country.countriesdata(False)["countries"]
+    Locations.set_validlocations(
+        [{"name": iso3.lower(), "title": iso3} for iso3 in countries]
+        + [{"name": "world", "title": "World"}]
+    )
+    tags = configuration["tags"]
+    Vocabulary.set_tagsdict(
+        {tag: {"Action to Take": "ok", "New Tag(s)": None} for tag in tags}
+    )
+    Vocabulary._approved_vocabulary = {
+        "tags": [{"name": tag} for tag in tags],
+        "id": "approved",
+        "name": "approved",
+    }
+    Resource.set_formatsdict(
+        {
+            file_format: file_format
+            for file_format in ("csv", "geojson", "geoparquet", "flatgeobuf")
+        }
+    )
+
+    def read_from_hdx(dataset_name):
+        # Only the boundaries dataset exists so every country is updated
+        if dataset_name != configuration["global_boundaries"]["dataset"]:
+            return None
+        return Dataset.load_from_json(
+            join(input_folder, f"dataset-{dataset_name}.json")
+        )
+
+    Dataset.read_from_hdx = staticmethod(read_from_hdx)
+    return configuration
+
+
+def run_stage(name: str, results: Dict, function, *args):
+    reset_peak_rss()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    results[name] = {
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": round(read_peak_rss(), 1),
+    }
+    print(f"  {name}: {seconds:.2f}s, peak RSS {results[name]['peak_rss_mb']}MB")
+    return result
+
+
+def benchmark(rows: int, workers: int) -> Dict:
+    print(f"Rows: {rows}")
+    with temp_dir(f"bench_pipeline_{rows}") as folder:
+        input_folder = join(folder, "input")
+        generate(input_folder, rows)
+        configuration = stub_hdx(input_folder)
+        stages = {}
+        with Download(user_agent="benchmark") as downloader:
+            retriever = Retrieve(
+                downloader=downloader,
+                fallback_dir=folder,
+                saved_dir=input_folder,
+                temp_dir=folder,
+                save=False,
+                use_saved=True,
+            )
+            ibtracs = Ibtracs(configuration, retriever, folder)
+            run_stage("get_data", stages, ibtracs.get_data)
+            countryiso3s = run_stage(
+                "process_countries", stages, ibtracs.process_countries
+            )
+            datasets = run_stage(
+                "generate_datasets",
+                stages,
+                lambda: list(ibtracs.generate_datasets(countryiso3s, workers)),
+            )
+            if workers > 1:
+                # Largest of any worker process so far
+                children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+                stages["generate_datasets"]["worker_peak_rss_mb"] = round(
+                    children / 1024, 1
+                )
+        return {"rows": rows, "datasets": len(datasets), "stages": stages}
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline_runs = {run["rows"]: run for run in baseline["runs"]}
+    print(f"Compared with {baseline.get('commit')}")
+    for run in results["runs"]:
+        baseline_run = baseline_runs.get(run["rows"])
+        if not baseline_run:
+            continue
+        for name, stage in run["stages"].items():
+            baseline_stage = baseline_run["stages"].get(name)
+            if not baseline_stage:
+                continue
+            time_ratio = stage["seconds"] / max(baseline_stage["seconds"], 0.001)
+            rss_ratio = stage["peak_rss_mb"] / max(baseline_stage["peak_rss_mb"], 0.1)
+            print(
+                f"  {run['rows']} rows {name}: time {time_ratio:.2f}x, "
+                f"peak RSS {rss_ratio:.2f}x"
+            )
+
+
+def main(rows: list, workers: int, output: str, baseline: Optional[str]) -> None:
+    results = {
+        "commit": get_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workers": workers,
+        "runs": [benchmark(row_count, workers) for row_count in rows],
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None)
+    args = parser.parse_args()
+    main(args.rows, args.workers, args.output, args.baseline)
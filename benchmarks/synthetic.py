@@ -0,0 +1,138 @@
+#!/usr/bin/python
+"""
+Deterministic generator of synthetic IBTrACS inputs. Storms from the CSV
+fixture are copied with new SIDs and their tracks shifted by a random
+longitude offset and jittered until the requested number of rows is
+reached. The CSV, a matching lines shapefile zip and the other files read
+by the scraper are written with the names the retriever expects in its
+saved data folder, so the whole pipeline can run against them with
+use_saved.
+
+    python benchmarks/synthetic.py --rows 100000 --folder /tmp/ibtracs
+
+"""
+
+import argparse
+import csv
+from os import makedirs
+from os.path import basename, dirname, join
+from shutil import copyfile
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import geopandas
+import numpy
+from hdx.utilities.path import temp_dir
+from pandas import DataFrame, concat, read_csv
+from shapely import linestrings
+
+_INPUT_DIR = join(dirname(__file__), "..", "tests", "fixtures", "input")
+_CSV = "csv-ibtracs-all-list-v04r01.csv"
+_LINES = "shapefile-ibtracs-all-list-v04r01-lines.zip"
+_SHAPEFILE = "IBTrACS.ALL.list.v04r01.lines"
+_COPIED = (
+    "ibtracs.txt",
+    "wrl_polbnda_int_1m_uncs.geojson",
+    "dataset-unmap-international-boundaries-geojson.json",
+)
+
+
+def format_degrees(values: numpy.ndarray) -> list:
+    return [f"{value:.1f}" for value in values.round(1).tolist()]
+
+
+def generate_rows(rows: int, seed: int = 0) -> DataFrame:
+    """Generate IBTrACS rows by copying the fixture storms with new SIDs and
+    shifted, jittered tracks until there are the requested number of rows
+
+    Args:
+        rows (int): Number of rows to generate
+        seed (int): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        DataFrame: Rows with all values as strings as in the IBTrACS CSV
+    """
+    rng = numpy.random.default_rng(seed)
+    template = read_csv(
+        join(_INPUT_DIR, _CSV), dtype=str, keep_default_na=False, skiprows=[1]
+    )
+    lons = template["LON"].astype(float).to_numpy()
+    lats = template["LAT"].astype(float).to_numpy()
+    copies = []
+    total = 0
+    copy_number = 0
+    while total < rows:
+        df = template.copy()
+        if copy_number:
+            df["SID"] = df["SID"] + f"{copy_number:04d}"
+            offset = rng.uniform(-180, 180)
+            jitter = rng.normal(0, 0.1, (len(df), 2))
+            df["LON"] = format_degrees((lons + offset + jitter[:, 0] + 180) % 360 - 180)
+            df["LAT"] = format_degrees(numpy.clip(lats + jitter[:, 1], -89, 89))
+        copies.append(df)
+        total += len(df)
+        copy_number += 1
+    return concat(copies, ignore_index=True).iloc[:rows]
+
+
+def write_csv(df: DataFrame, path: str) -> None:
+    units = [" ", " ", " ", " ", " ", " ", "degrees_north", "degrees_east", "kts", "mb"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(df.columns)
+        writer.writerow(units)
+        writer.writerows(df.itertuples(index=False))
+
+
+def write_lines(df: DataFrame, path: str) -> None:
+    # One line from each point to the next point of the same storm
+    same_storm = (df["SID"].to_numpy()[:-1] == df["SID"].to_numpy()[1:]).nonzero()[0]
+    lons = df["LON"].astype(float).to_numpy()
+    lats = df["LAT"].astype(float).to_numpy()
+    coordinates = numpy.stack(
+        (
+            numpy.column_stack((lons[same_storm], lats[same_storm])),
+            numpy.column_stack((lons[same_storm + 1], lats[same_storm + 1])),
+        ),
+        axis=1,
+    )
+    lines_df = df.iloc[same_storm].reset_index(drop=True)
+    for column in ("LAT", "LON", "WMO_WIND", "WMO_PRES"):
+        lines_df[column] = lines_df[column].replace(" ", None).astype(float)
+    lines_df["NUMBER"] = lines_df["NUMBER"].astype(int)
+    lines_df = geopandas.GeoDataFrame(
+        lines_df, geometry=linestrings(coordinates), crs="EPSG:4326"
+    )
+    with temp_dir("synthetic_lines", delete_on_failure=True) as folder:
+        lines_df.to_file(join(folder, f"{_SHAPEFILE}.shp"))
+        with ZipFile(path, "w", ZIP_DEFLATED) as z:
+            for extension in ("shp", "shx", "dbf", "prj"):
+                filename = f"{_SHAPEFILE}.{extension}"
+                z.write(join(folder, filename), filename)
+
+
+def generate(folder: str, rows: int, seed: int = 0) -> None:
+    """Generate synthetic IBTrACS inputs in a saved data folder
+
+    Args:
+        folder (str): Folder in which to write inputs
+        rows (int): Number of CSV rows to generate
+        seed (int): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        None
+    """
+    makedirs(folder, exist_ok=True)
+    df = generate_rows(rows, seed)
+    write_csv(df, join(folder, _CSV))
+    write_lines(df, join(folder, _LINES))
+    for filename in _COPIED:
+        copyfile(join(_INPUT_DIR, filename), join(folder, basename(filename)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--folder", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.folder, args.rows, args.seed)
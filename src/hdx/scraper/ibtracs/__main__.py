@@ -6,7 +6,9 @@ script then creates in HDX.
 """
 
 import logging
+from os import makedirs
 from os.path import dirname, expanduser, join
+from typing import Optional
 
 from hdx.api.configuration import Configuration
 from hdx.data.user import User
@@ -15,24 +17,41 @@ from hdx.utilities.downloader import Download
 from hdx.utilities.path import temp_dir_batch
 from hdx.utilities.retriever import Retrieve
 
+from hdx.scraper.ibtracs.checkpoint import Checkpoint
 from hdx.scraper.ibtracs.ibtracs import Ibtracs
+from hdx.scraper.ibtracs.instrumentation import Instrumentation
+from hdx.scraper.ibtracs.upload import UploadPipeline
 
 logger = logging.getLogger(__name__)
 
 _USER_AGENT_LOOKUP = "hdx-scraper-ibtracs"
 _SAVED_DATA_DIR = "saved_data"  # Keep in repo to avoid deletion in /tmp
+_CACHE_DIR = join(_SAVED_DATA_DIR, "cache")
+_STATE_FILE = join(_SAVED_DATA_DIR, "state.json")
+_DOWNLOAD_DIR = join(_SAVED_DATA_DIR, "downloads")
+_REPORT_FILE = join(_SAVED_DATA_DIR, "run_report.json")
+_PROFILE_DIR = join(_SAVED_DATA_DIR, "profiles")
+_CHECKPOINT_DIR = join(_SAVED_DATA_DIR, "checkpoint")
 _UPDATED_BY_SCRIPT = "HDX Scraper: IBTrACS"
 
 
 def main(
     save: bool = True,
     use_saved: bool = False,
+    workers: int = 1,
+    incremental: bool = False,
+    profile_country: Optional[str] = None,
+    profiler: str = "cprofile",
 ) -> None:
     """Generate datasets and create them in HDX
 
     Args:
         save (bool): Save downloaded data. Defaults to True.
         use_saved (bool): Use saved data. Defaults to False.
+        workers (int): Number of processes writing dataset files. Defaults to 1.
+        incremental (bool): Only process countries affected by storms changed since the last successful run. Defaults to False.
+        profile_country (Optional[str]): ISO3 code or world to profile. Its upload is profiled in the upload thread running it while generation and other uploads carry on in other threads, so the upload profile covers only that thread and its times include waiting on the others. Defaults to None.
+        profiler (str): Profiler to use: cprofile or pyinstrument. Defaults to cprofile.
 
     Returns:
         None
@@ -41,40 +60,87 @@ def main(
     if not User.check_current_user_organization_access("hdx", "create_dataset"):
         raise PermissionError("API Token does not give access to HDX organisation!")
 
-    with temp_dir_batch(folder=_USER_AGENT_LOOKUP) as info:
-        temp_dir = info["folder"]
-        with Download() as downloader:
-            retriever = Retrieve(
-                downloader=downloader,
-                fallback_dir=temp_dir,
-                saved_dir=_SAVED_DATA_DIR,
-                temp_dir=temp_dir,
-                save=save,
-                use_saved=use_saved,
-            )
-            ibtracs = Ibtracs(configuration, retriever, temp_dir)
-            ibtracs.get_data()
-            countryiso3s = ibtracs.process_countries()
-            for countryiso3 in countryiso3s:
-                dataset = ibtracs.generate_dataset(countryiso3)
-                if not dataset:
-                    continue
-                dataset.update_from_yaml(
-                    path=join(
-                        dirname(__file__),
-                        "config",
-                        "hdx_dataset_static.yaml",
-                    )
+    instrumentation = Instrumentation(profile_country, _PROFILE_DIR, profiler)
+    checkpoint = Checkpoint(_CHECKPOINT_DIR)
+    try:
+        with temp_dir_batch(folder=_USER_AGENT_LOOKUP, batch=checkpoint.batch) as info:
+            temp_dir = info["folder"]
+            with Download() as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=temp_dir,
+                    saved_dir=_SAVED_DATA_DIR,
+                    temp_dir=temp_dir,
+                    save=save,
+                    use_saved=use_saved,
                 )
-                dataset["notes"] = dataset["notes"].replace(
-                    "\n", "  \n"
-                )  # ensure markdown has line breaks
-                dataset.create_in_hdx(
-                    remove_additional_resources=True,
-                    match_resource_order=True,
-                    updated_by_script=_UPDATED_BY_SCRIPT,
-                    batch=info["batch"],
+                ibtracs = Ibtracs(
+                    configuration,
+                    retriever,
+                    temp_dir,
+                    _CACHE_DIR,
+                    _STATE_FILE,
+                    incremental,
+                    _DOWNLOAD_DIR,
+                    instrumentation,
+                    checkpoint,
                 )
+                if not ibtracs.get_data():
+                    logger.info("No new IBTrACS data to publish")
+                    checkpoint.clear()
+                    return
+                countryiso3s = ibtracs.process_countries()
+                published = [
+                    countryiso3
+                    for countryiso3 in countryiso3s
+                    if checkpoint.is_published(ibtracs.get_dataset_name(countryiso3))
+                ]
+                if published:
+                    logger.info(f"Already published {len(published)} datasets")
+                    countryiso3s = [c for c in countryiso3s if c not in published]
+
+                def upload(countryiso3, dataset):
+                    with instrumentation.profile(countryiso3, "create_in_hdx"):
+                        with instrumentation.stage(
+                            "create_in_hdx", countryiso3, concurrent=True
+                        ):
+                            # Files whose hash matches HDX's are not uploaded
+                            dataset.create_in_hdx(
+                                remove_additional_resources=True,
+                                match_resource_order=True,
+                                updated_by_script=_UPDATED_BY_SCRIPT,
+                                batch=info["batch"],
+                            )
+                    checkpoint.mark_published(
+                        dataset["name"], ibtracs.get_resource_filenames(countryiso3)
+                    )
+
+                with UploadPipeline(
+                    upload,
+                    configuration.get("upload_workers", 2),
+                    configuration.get("upload_queue_size", 2),
+                    configuration.get("upload_retries", 3),
+                    configuration.get("upload_retry_delay", 5),
+                ) as pipeline:
+                    for countryiso3, dataset in ibtracs.generate_datasets(
+                        countryiso3s, workers, pipeline.reserve
+                    ):
+                        dataset.update_from_yaml(
+                            path=join(
+                                dirname(__file__),
+                                "config",
+                                "hdx_dataset_static.yaml",
+                            )
+                        )
+                        dataset["notes"] = dataset["notes"].replace(
+                            "\n", "  \n"
+                        )  # ensure markdown has line breaks
+                        pipeline.submit(countryiso3, dataset)
+                ibtracs.save_state()
+                checkpoint.clear()
+    finally:
+        makedirs(_SAVED_DATA_DIR, exist_ok=True)
+        instrumentation.write_report(_REPORT_FILE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,246 @@
+"""Checkpoint of a publishing run so that an interrupted run can resume"""
+
+import json
+import logging
+from os import link, makedirs, remove, replace
+from os.path import exists, join
+from shutil import copyfile, rmtree
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from hdx.utilities.uuid import get_uuid
+
+from hdx.scraper.ibtracs.utilities import hash_file
+
+logger = logging.getLogger(__name__)
+
+_CHECKPOINT = "checkpoint.json"
+_FILES_DIR = "files"
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    # Hard links avoid rewriting large files but need a single filesystem
+    try:
+        link(source, destination)
+    except OSError:
+        copyfile(source, destination)
+
+
+class Checkpoint:
+    """Progress of a publishing run stored in a folder: the HDX batch, the
+    inputs and writer settings the run is for, the computed SID to ISO3
+    membership, the generated resource files with their hashes and the
+    datasets already published. A restarted run with the same inputs reuses
+    the batch and membership, links back generated files whose hashes still
+    match and skips published datasets. Different inputs discard everything
+    but the batch, as does membership computed with different boundaries,
+    distance or engine. The folder is removed once the run completes.
+
+    Generated files are hard linked into the folder where possible rather
+    than copied, and each is stored with a sidecar file holding its hash
+    rather than in the checkpoint JSON so that forked file writers can save
+    files without sharing state. A dataset's files are deleted once it is
+    published. Datasets can be marked published from any thread.
+
+    Args:
+        folder (str): Folder for checkpoint and generated files
+    """
+
+    def __init__(self, folder: str):
+        self._folder = folder
+        self._path = join(folder, _CHECKPOINT)
+        self._files_dir = join(folder, _FILES_DIR)
+        self._lock = Lock()
+        if exists(self._path):
+            with open(self._path, encoding="utf-8") as f:
+                self._checkpoint = json.load(f)
+            logger.info(f"Resuming batch {self._checkpoint['batch']} from checkpoint")
+        else:
+            self._checkpoint = {"batch": get_uuid(), "published": []}
+
+    @property
+    def batch(self) -> str:
+        """HDX batch of the run, reused when resuming
+
+        Returns:
+            str: Batch
+        """
+        return self._checkpoint["batch"]
+
+    def _save(self) -> None:
+        makedirs(self._folder, exist_ok=True)
+        temp_path = f"{self._path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._checkpoint, f)
+        replace(temp_path, self._path)
+
+    def _discard(self) -> None:
+        self._checkpoint = {
+            "batch": self.batch,
+            "inputs": self._checkpoint.get("inputs"),
+            "published": [],
+        }
+        rmtree(self._files_dir, ignore_errors=True)
+
+    def start(self, inputs: Dict[str, Any]) -> None:
+        """Start or resume a run for the given inputs, discarding any progress
+        made on different inputs
+
+        Args:
+            inputs (Dict[str, Any]): Version and hashes of the input files and writer settings
+
+        Returns:
+            None
+        """
+        if self._checkpoint.get("inputs") != inputs:
+            if "inputs" in self._checkpoint:
+                logger.info("Inputs changed, discarding checkpoint")
+            self._discard()
+            self._checkpoint["inputs"] = inputs
+        self._save()
+
+    def load_membership(
+        self, membership_key: str
+    ) -> Optional[Tuple[Dict[str, Set[str]], List[str], List[str]]]:
+        """Load the checkpointed membership if it was computed with the given
+        boundaries, distance and engine
+
+        Args:
+            membership_key (str): Key of the current boundaries, distance and engine
+
+        Returns:
+            Optional[Tuple[Dict[str, Set[str]], List[str], List[str]]]: Membership, countries in order and ISO3 codes and/or world to process or None
+        """
+        if self._checkpoint.get("membership_key") != membership_key:
+            return None
+        membership = {
+            sid: set(iso3s) for sid, iso3s in self._checkpoint["membership"].items()
+        }
+        logger.info(f"Using checkpointed membership of {len(membership)} storms")
+        return (
+            membership,
+            self._checkpoint["countries"],
+            self._checkpoint["countryiso3s"],
+        )
+
+    def save_membership(
+        self,
+        membership_key: str,
+        membership: Dict[str, Set[str]],
+        countries: List[str],
+        countryiso3s: List[str],
+    ) -> None:
+        """Save the computed membership. Files and published datasets from
+        membership computed with a different key are discarded.
+
+        Args:
+            membership_key (str): Key of the boundaries, distance and engine used
+            membership (Dict[str, Set[str]]): Mapping of SID to set of ISO3 codes
+            countries (List[str]): ISO3 codes of countries with storms in order
+            countryiso3s (List[str]): ISO3 codes and/or world to process
+
+        Returns:
+            None
+        """
+        previous_key = self._checkpoint.get("membership_key")
+        if previous_key and previous_key != membership_key:
+            logger.info("Membership changed, discarding checkpointed files")
+            self._discard()
+        self._checkpoint["membership_key"] = membership_key
+        self._checkpoint["membership"] = {
+            sid: sorted(iso3s) for sid, iso3s in sorted(membership.items())
+        }
+        self._checkpoint["countries"] = countries
+        self._checkpoint["countryiso3s"] = countryiso3s
+        self._save()
+
+    def save_files(self, filenames: List[str], folder: str) -> None:
+        """Link or copy generated files into the checkpoint and record their
+        hashes
+
+        Args:
+            filenames (List[str]): Names of generated files
+            folder (str): Folder containing the files
+
+        Returns:
+            None
+        """
+        makedirs(self._files_dir, exist_ok=True)
+        for filename in filenames:
+            path = join(self._files_dir, filename)
+            hash_path = f"{path}.sha256"
+            for old_path in (hash_path, path):
+                if exists(old_path):
+                    remove(old_path)
+            _link_or_copy(join(folder, filename), path)
+            with open(hash_path, "w", encoding="utf-8") as f:
+                f.write(hash_file(path))
+
+    def restore_files(self, filenames: List[str], folder: str) -> bool:
+        """Link or copy checkpointed files into a folder if all of them exist
+        and match their recorded hashes
+
+        Args:
+            filenames (List[str]): Names of files
+            folder (str): Folder to copy the files into
+
+        Returns:
+            bool: Whether the files were restored
+        """
+        for filename in filenames:
+            path = join(self._files_dir, filename)
+            hash_path = f"{path}.sha256"
+            if not exists(path) or not exists(hash_path):
+                return False
+            with open(hash_path, encoding="utf-8") as f:
+                if f.read() != hash_file(path):
+                    logger.warning(f"Checkpointed {filename} is corrupt")
+                    return False
+        for filename in filenames:
+            path = join(folder, filename)
+            if exists(path):
+                remove(path)
+            _link_or_copy(join(self._files_dir, filename), path)
+        return True
+
+    def is_published(self, dataset_name: str) -> bool:
+        """Whether a dataset was already published in this run
+
+        Args:
+            dataset_name (str): Name of dataset
+
+        Returns:
+            bool: Whether dataset was published
+        """
+        return dataset_name in self._checkpoint["published"]
+
+    def mark_published(
+        self, dataset_name: str, filenames: Optional[List[str]] = None
+    ) -> None:
+        """Record a dataset as published in this run and delete its
+        checkpointed files, which a resumed run will not need
+
+        Args:
+            dataset_name (str): Name of dataset
+            filenames (Optional[List[str]]): Names of the dataset's files. Defaults to None.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._checkpoint["published"].append(dataset_name)
+            self._save()
+        for filename in filenames or []:
+            path = join(self._files_dir, filename)
+            for old_path in (f"{path}.sha256", path):
+                if exists(old_path):
+                    remove(old_path)
+
+    def clear(self) -> None:
+        """Remove the checkpoint after a completed run
+
+        Returns:
+            None
+        """
+        rmtree(self._folder, ignore_errors=True)
+        logger.info("Run complete, removed checkpoint")
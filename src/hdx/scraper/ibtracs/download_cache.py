@@ -0,0 +1,130 @@
+"""Conditional downloading with a persistent cache of artifacts"""
+
+import json
+import logging
+from os import makedirs, replace
+from os.path import exists, join
+from shutil import copyfile
+from typing import Dict, Optional, Tuple
+
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.ibtracs.utilities import hash_file
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST = "manifest.json"
+
+
+class DownloadCache:
+    """Cache of downloaded artifacts that records the version, ETag,
+    Last-Modified and content hash of each. Downloads are conditional on
+    the recorded ETag and Last-Modified so an unchanged artifact is reused
+    from the cache. Each artifact also records the hash of the copy used by
+    the last published run so callers can skip work when nothing changed.
+
+    When the retriever uses saved data, the saved file is used in place of a
+    download but is still hashed and compared with the published copy.
+
+    Args:
+        retriever (Retrieve): Retriever whose downloader is used
+        folder (str): Folder for cached artifacts and manifest
+    """
+
+    def __init__(self, retriever: Retrieve, folder: str):
+        self._retriever = retriever
+        self._folder = folder
+        self._manifest_path = join(folder, _MANIFEST)
+        if exists(self._manifest_path):
+            with open(self._manifest_path, encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        else:
+            self._manifest = {}
+        self._downloaded = []
+
+    def _save_manifest(self) -> None:
+        makedirs(self._folder, exist_ok=True)
+        temp_path = f"{self._manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+        replace(temp_path, self._manifest_path)
+
+    def _get_conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if not entry or not exists(entry["path"]):
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def download_file(self, url: str, version: str) -> Tuple[str, bool]:
+        """Download a file unless the cached copy is still current
+
+        Args:
+            url (str): URL to download
+            version (str): IBTrACS version of the artifact
+
+        Returns:
+            Tuple[str, bool]: Path to file and whether it differs from the published copy
+        """
+        filename, _ = self._retriever.get_filename(url)
+        entry = self._manifest.get(url)
+        if self._retriever.use_saved:
+            path = str(self._retriever.download_file(url))
+            etag = last_modified = None
+        else:
+            headers = self._get_conditional_headers(entry)
+            downloader = self._retriever.downloader
+            response = downloader.setup(url, headers=headers)
+            if response.status_code == 304:
+                logger.info(f"{filename} not modified, using cached copy")
+                path = entry["path"]
+            else:
+                makedirs(self._folder, exist_ok=True)
+                path = join(self._folder, filename)
+                logger.info(f"Downloading {filename} into {path}")
+                downloader.stream_path(path, f"Download of {url} failed!")
+                if self._retriever.save:
+                    copyfile(path, join(self._retriever.saved_dir, filename))
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        sha256 = hash_file(path)
+        published = entry.get("published_sha256") if entry else None
+        self._manifest[url] = {
+            "version": version,
+            "path": path,
+            "etag": etag,
+            "last_modified": last_modified,
+            "sha256": sha256,
+            "published_sha256": published,
+        }
+        self._downloaded.append(url)
+        self._save_manifest()
+        changed = sha256 != published
+        if not changed:
+            logger.info(f"{filename} unchanged since last published run")
+        return path, changed
+
+    def get_hash(self, url: str) -> str:
+        """Get the content hash of a file downloaded in this run
+
+        Args:
+            url (str): URL of file
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        return self._manifest[url]["sha256"]
+
+    def mark_published(self) -> None:
+        """Record the artifacts downloaded in this run as published
+
+        Returns:
+            None
+        """
+        for url in self._downloaded:
+            entry = self._manifest[url]
+            entry["published_sha256"] = entry["sha256"]
+        self._save_manifest()
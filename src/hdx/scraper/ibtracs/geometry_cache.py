@@ -0,0 +1,87 @@
+"""On-disk cache of buffered country geometries"""
+
+import hashlib
+import logging
+from glob import glob
+from os import makedirs, remove, replace
+from os.path import exists, join
+from typing import Optional
+
+import geopandas
+from geopandas import GeoDataFrame
+
+from hdx.scraper.ibtracs.utilities import hash_file
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "buffered_countries_"
+
+
+class GeometryCache:
+    """Cache of valid, dissolved and buffered country polygons stored as a
+    GeoPackage (WKB geometry blobs) per cache key. The key is derived from the
+    boundary file contents, buffer distance and CRS so any change to them
+    invalidates the cache.
+
+    Args:
+        folder (str): Folder in which to store cached geometries
+    """
+
+    def __init__(self, folder: str):
+        self._folder = folder
+
+    @staticmethod
+    def get_key(boundary_path: str, distance: float, crs: str) -> str:
+        """Get the cache key for a boundary file, buffer distance and CRS
+
+        Args:
+            boundary_path (str): Path to boundary file
+            distance (float): Buffer distance
+            crs (str): CRS in which buffering is done
+
+        Returns:
+            str: Cache key
+        """
+        sha = hashlib.sha256()
+        sha.update(hash_file(boundary_path).encode())
+        sha.update(f"|{float(distance)}|{crs}".encode())
+        return sha.hexdigest()[:16]
+
+    def _get_path(self, key: str) -> str:
+        return join(self._folder, f"{_PREFIX}{key}.gpkg")
+
+    def load(self, key: str) -> Optional[GeoDataFrame]:
+        """Load buffered countries for a cache key
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[GeoDataFrame]: Buffered countries or None if not cached
+        """
+        path = self._get_path(key)
+        if not exists(path):
+            logger.info(f"Geometry cache miss for {key}")
+            return None
+        logger.info(f"Geometry cache hit for {key}")
+        return geopandas.read_file(path)
+
+    def save(self, key: str, countries: GeoDataFrame) -> None:
+        """Save buffered countries under a cache key, removing any stale entries
+
+        Args:
+            key (str): Cache key
+            countries (GeoDataFrame): Buffered countries
+
+        Returns:
+            None
+        """
+        makedirs(self._folder, exist_ok=True)
+        path = self._get_path(key)
+        for stale_path in glob(join(self._folder, f"{_PREFIX}*.gpkg")):
+            if stale_path != path:
+                remove(stale_path)
+        temp_path = join(self._folder, f"{_PREFIX}{key}.tmp.gpkg")
+        countries.to_file(temp_path, driver="GPKG", layer="countries")
+        replace(temp_path, path)
+        logger.info(f"Saved {len(countries)} countries to geometry cache {key}")
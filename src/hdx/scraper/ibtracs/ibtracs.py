@@ -2,13 +2,15 @@
 """ibtracs scraper"""
 
 import logging
+from collections import deque
 from datetime import date
+from multiprocessing import get_all_start_methods, get_context
 from os.path import join
-from typing import List, Optional
-from zipfile import ZipFile
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 import geopandas
 import numpy
+import shapely
 from bs4 import BeautifulSoup
 from hdx.api.configuration import Configuration
 from hdx.data.dataset import Dataset
@@ -18,30 +20,110 @@ from hdx.location.country import Country
 from hdx.utilities.dateparse import parse_date
 from hdx.utilities.dictandlist import dict_of_dicts_add
 from hdx.utilities.retriever import Retrieve
-from pandas import concat, read_csv
-from shapely.validation import make_valid
+from pandas import DataFrame, Series, to_datetime
+
+from hdx.scraper.ibtracs.checkpoint import Checkpoint
+from hdx.scraper.ibtracs.download_cache import DownloadCache
+from hdx.scraper.ibtracs.geometry_cache import GeometryCache
+from hdx.scraper.ibtracs.ingest import (
+    map_codes,
+    read_ibtracs_csv,
+    read_ibtracs_lines,
+)
+from hdx.scraper.ibtracs.instrumentation import Instrumentation
+from hdx.scraper.ibtracs.membership import (
+    BUFFERED_ENGINES,
+    GEOGRAPHIC_ENGINES,
+    buffer_boundaries,
+    get_country_sids,
+    get_membership,
+)
+from hdx.scraper.ibtracs.prefetch import get_dataset_end_date, prefetch_end_dates
+from hdx.scraper.ibtracs.state import RunState, get_changed_sids, get_storm_digests
+from hdx.scraper.ibtracs.storm_index import StormIndex
+from hdx.scraper.ibtracs.utilities import hash_file
+from hdx.scraper.ibtracs.writers import write_csv, write_geojson, write_geoparquet
 
 logger = logging.getLogger(__name__)
 
+_CRS = "ESRI:54009"  # Mollweide equal area projection used for buffering
+_ISO_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Settings that change the bytes of written resource files
+_WRITER_SETTINGS = (
+    "columns_subset",
+    "geojson_precision",
+    "geojson_rfc7946",
+    "columnar_resources",
+    "parquet_row_group_size",
+)
+
+_worker_ibtracs = None  # Set in the parent before forking file writers
+
 
 class Ibtracs:
     def __init__(
-        self, configuration: Configuration, retriever: Retrieve, temp_dir: str
+        self,
+        configuration: Configuration,
+        retriever: Retrieve,
+        temp_dir: str,
+        cache_dir: Optional[str] = None,
+        state_file: Optional[str] = None,
+        incremental: bool = False,
+        download_dir: Optional[str] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        checkpoint: Optional[Checkpoint] = None,
     ):
         self._configuration = configuration
         self._retriever = retriever
         self._temp_dir = temp_dir
+        self._geometry_cache = GeometryCache(cache_dir) if cache_dir else None
+        self._run_state = RunState(state_file) if state_file else None
+        self._incremental = incremental
+        self.instrumentation = instrumentation or Instrumentation()
+        self._download_cache = (
+            DownloadCache(retriever, download_dir) if download_dir else None
+        )
+        self._checkpoint = checkpoint
+        self._membership_key = None
+        self._digests = None
+        self._membership = None
         self.data = {}
+        self.units = None
+        self._csv_index = None
+        self._geo_index = None
+        self._dataset_end_dates = {}
+        self.iso_times = None
+        self.storm_times = None
 
-    def generate_dataset(self, countryiso3: str) -> Optional[Dataset]:
+    def get_dataset_name(self, countryiso3: str) -> str:
+        if countryiso3 == "world":
+            return self._configuration["dataset_names"][countryiso3]
+        dataset_name = self._configuration["dataset_names"]["country"]
+        return dataset_name.format(iso=countryiso3.lower())
+
+    def prefetch_dataset_dates(self, countryiso3s: List[str]) -> None:
+        dataset_names = [
+            self.get_dataset_name(countryiso3)
+            for countryiso3 in countryiso3s
+            if countryiso3 != "world"
+        ]
+        if not dataset_names:
+            return
+        self._dataset_end_dates = prefetch_end_dates(
+            dataset_names,
+            self._configuration.get("hdx_workers", 8),
+            self._configuration.get("hdx_calls_per_second", 5),
+        )
+
+    def generate_dataset(
+        self, countryiso3: str, write_files: bool = True
+    ) -> Optional[Dataset]:
+        dataset_name = self.get_dataset_name(countryiso3)
         if countryiso3 == "world":
-            dataset_name = self._configuration["dataset_names"][countryiso3]
             dataset_title = self._configuration["dataset_titles"][countryiso3]
         else:
             country_name = Country.get_country_name_from_iso3(countryiso3)
-            dataset_name = self._configuration["dataset_names"]["country"]
             dataset_title = self._configuration["dataset_titles"]["country"]
-            dataset_name = dataset_name.format(iso=countryiso3.lower())
             dataset_title = dataset_title.format(country=country_name)
         dataset = Dataset(
             {
@@ -60,147 +142,379 @@ class Ibtracs:
                 logger.error(f"Couldn't find country {countryiso3}, skipping")
                 return None
             dataset.set_expected_update_frequency("-2")
-        ibtracs_df = self.data[countryiso3]["csv"]
-        ibtracs_dict = ibtracs_df.apply(lambda x: x.to_dict(), axis=1)
-        dates = list(set(ibtracs_df["ISO_TIME"][1:]))
-        dates = [parse_date(d) for d in dates]
-        start_year = min(dates).year
-        end_date = max(dates)
+        if countryiso3 == "world":
+            storm_times = self.storm_times
+        else:
+            storm_times = self.storm_times.loc[self.data[countryiso3]["sids"]]
+        start_date = storm_times["start"].min().to_pydatetime()
+        start_year = start_date.year
+        end_date = storm_times["end"].max().to_pydatetime()
         dataset.set_time_period(
-            startdate=min(dates),
+            startdate=start_date,
             enddate=end_date,
         )
         if countryiso3 != "world":
-            updated = check_dataset_date(dataset_name, end_date)
+            if dataset_name in self._dataset_end_dates:
+                updated = is_updated(end_date, self._dataset_end_dates[dataset_name])
+            else:
+                updated = check_dataset_date(dataset_name, end_date)
             if not updated:
                 logger.info(f"Data has not been updated for {countryiso3}")
                 return None
-        logger.info(
-            f"Generating dataset {dataset.get_name_or_id()} from {len(ibtracs_df)} rows."
-        )
+        logger.info(f"Generating dataset {dataset.get_name_or_id()}")
+        if write_files:
+            self.write_files(countryiso3)
 
-        file_loc = "" if countryiso3 == "world" else f"_{countryiso3}"
+        csv_name, geo_name = get_filenames(countryiso3)
         desc_loc = (
             ""
             if countryiso3 == "world"
             else f" that pass within 2000 kilometers of {country_name}"
         )
-        resource_name = f"ibtracs_ALL_list_v04r01{file_loc}.csv"
-        dataset.generate_resource(
-            folder=self._temp_dir,
-            filename=resource_name,
-            rows=ibtracs_dict,
-            resourcedata={
-                "name": resource_name,
-                "description": f"IBTrACS storm tracks from {start_year} to date{desc_loc}.",
-            },
-            headers=list(ibtracs_dict[0].keys()),
-            encoding="utf-8",
-        )
-
-        # add geo resource
-        geo_df = self.data[countryiso3]["geo"]
-        resource_name = f"ibtracs_ALL_list_v04r01_lines{file_loc}.geojson"
-        geo_path = join(self._temp_dir, resource_name)
-        geo_df.to_file(geo_path, driver="GeoJSON")
-        resource = Resource(
-            {
-                "name": resource_name,
-                "description": f"IBTrACS storm tracks from {start_year} to date{desc_loc}.",
-            }
-        )
-        resource.set_format("GeoJSON")
-        resource.set_file_to_upload(geo_path)
-        dataset.add_update_resource(resource)
+        description = f"IBTrACS storm tracks from {start_year} to date{desc_loc}"
+        resources = [
+            (csv_name, "csv", f"{description}."),
+            (geo_name, "GeoJSON", f"{description}."),
+        ]
+        if self._configuration.get("columnar_resources"):
+            parquet_name, fgb_name = get_columnar_filenames(countryiso3)
+            resources.append(
+                (
+                    parquet_name,
+                    "GeoParquet",
+                    f"{description} as points ordered by storm and time.",
+                )
+            )
+            resources.append(
+                (
+                    fgb_name,
+                    "FlatGeobuf",
+                    f"{description} as lines with a spatial index.",
+                )
+            )
+        for resource_name, file_format, resource_description in resources:
+            resource = Resource(
+                {
+                    "name": resource_name,
+                    "description": resource_description,
+                }
+            )
+            resource.set_format(file_format)
+            resource.set_file_to_upload(join(self._temp_dir, resource_name))
+            dataset.add_update_resource(resource)
 
         return dataset
 
-    def get_data(self) -> None:
-        # find latest version
-        text = self._retriever.download_text(
-            self._configuration["base_url"], "ibtracs.txt"
+    def generate_datasets(
+        self,
+        countryiso3s: List[str],
+        workers: int = 1,
+        reserve: Optional[Callable[[bool], bool]] = None,
+    ) -> Iterator[Tuple[str, Dataset]]:
+        """Generate datasets in order, skipping those with no new data. With
+        more than one worker, files are written by a pool of processes forked
+        from this one so the world frames are shared copy-on-write rather than
+        pickled. Datasets are yielded as soon as their files are written.
+
+        If reserve is given, it is called before each dataset's files are
+        written, so their number can be capped until earlier datasets are
+        uploaded. It is called with blocking False while other datasets are
+        still being written and with blocking True otherwise.
+
+        Args:
+            countryiso3s (List[str]): ISO3 codes and/or world
+            workers (int): Number of processes writing files. Defaults to 1.
+            reserve (Optional[Callable[[bool], bool]]): Function reserving room for a dataset's files. Defaults to None.
+
+        Returns:
+            Iterator[Tuple[str, Dataset]]: ISO3 code or world and dataset with files written
+        """
+        self.prefetch_dataset_dates(countryiso3s)
+        if workers <= 1 or "fork" not in get_all_start_methods():
+            for countryiso3 in countryiso3s:
+                dataset = self.generate_dataset(countryiso3, write_files=False)
+                if not dataset:
+                    continue
+                if reserve:
+                    reserve(True)
+                self.write_files(countryiso3)
+                yield countryiso3, dataset
+            return
+        candidates = deque()
+        for countryiso3 in countryiso3s:
+            dataset = self.generate_dataset(countryiso3, write_files=False)
+            if dataset:
+                candidates.append((countryiso3, dataset))
+        global _worker_ibtracs
+        _worker_ibtracs = self
+        try:
+            with get_context("fork").Pool(workers) as pool:
+                pending = deque()
+                while candidates or pending:
+                    # Only wait for room when no written dataset can be yielded
+                    while candidates and (reserve is None or reserve(not pending)):
+                        countryiso3, dataset = candidates.popleft()
+                        written = pool.apply_async(_write_files, (countryiso3,))
+                        pending.append((countryiso3, dataset, written))
+                    countryiso3, dataset, written = pending.popleft()
+                    self.instrumentation.add_records(written.get())
+                    yield countryiso3, dataset
+        finally:
+            _worker_ibtracs = None
+
+    def get_resource_filenames(self, countryiso3: str) -> List[str]:
+        filenames = list(get_filenames(countryiso3))
+        if self._configuration.get("columnar_resources"):
+            filenames.extend(get_columnar_filenames(countryiso3))
+        return filenames
+
+    def write_files(self, countryiso3: str) -> None:
+        filenames = self.get_resource_filenames(countryiso3)
+        if self._checkpoint and self._checkpoint.restore_files(
+            filenames, self._temp_dir
+        ):
+            logger.info(f"Using checkpointed files for {countryiso3}")
+            return
+        with self.instrumentation.profile(countryiso3, "write_files"):
+            with self.instrumentation.stage("join", countryiso3) as record:
+                ibtracs_df, geo_df = self.get_frames(countryiso3)
+                record["rows"] = len(ibtracs_df)
+                record["features"] = len(geo_df)
+            logger.info(f"Writing {len(ibtracs_df)} rows for {countryiso3}")
+            with self.instrumentation.stage("serialize", countryiso3) as record:
+                self._write_frames(countryiso3, ibtracs_df, geo_df)
+                record["rows"] = len(ibtracs_df)
+                record["features"] = len(geo_df)
+        if self._checkpoint:
+            self._checkpoint.save_files(filenames, self._temp_dir)
+
+    def _write_frames(
+        self, countryiso3: str, ibtracs_df: DataFrame, geo_df: geopandas.GeoDataFrame
+    ) -> None:
+        csv_name, geo_name = get_filenames(countryiso3)
+        write_csv(ibtracs_df, join(self._temp_dir, csv_name), self.units)
+        write_geojson(
+            geo_df,
+            join(self._temp_dir, geo_name),
+            self._configuration.get("geojson_precision"),
+            self._configuration.get("geojson_rfc7946", False),
         )
-        soup = BeautifulSoup(text, "html.parser")
-        lines = soup.find_all("a")
-        versions = []
-        for line in lines:
-            version = line.get("href")
-            if version[0] == "v":
-                versions.append(version)
-        version = versions[-1].replace("/", "")
+        if self._configuration.get("columnar_resources"):
+            parquet_name, fgb_name = get_columnar_filenames(countryiso3)
+            write_geoparquet(
+                ibtracs_df,
+                self.iso_times,
+                join(self._temp_dir, parquet_name),
+                self._configuration.get("parquet_row_group_size", 100000),
+            )
+            geo_df.to_file(
+                join(self._temp_dir, fgb_name),
+                driver="FlatGeobuf",
+                SPATIAL_INDEX="YES",
+            )
+
+    def get_data(self) -> bool:
+        with self.instrumentation.stage("version_discovery"):
+            # find latest version
+            text = self._retriever.download_text(
+                self._configuration["base_url"], "ibtracs.txt"
+            )
+            soup = BeautifulSoup(text, "html.parser")
+            lines = soup.find_all("a")
+            versions = []
+            for line in lines:
+                version = line.get("href")
+                if version[0] == "v":
+                    versions.append(version)
+            version = versions[-1].replace("/", "")
         csv_url = f"{self._configuration['base_url']}{self._configuration['csv'].format(version=version)}"
-        csv_file = self._retriever.download_file(csv_url)
         lines_url = f"{self._configuration['base_url']}{self._configuration['lines'].format(version=version)}"
-        lines_file = self._retriever.download_file(lines_url)
-        with ZipFile(lines_file, "r") as z:
-            z.extractall(self._temp_dir)
-        lines_shp = join(self._temp_dir, f"IBTrACS.ALL.list.{version}.lines.shp")
-        lines_df = geopandas.read_file(
-            lines_shp,
-            columns=self._configuration["columns_subset"],
-        )
-        lines_df = lines_df.replace({"NATURE": self._configuration["nature_mapping"]})
-        lines_df = lines_df.replace({"BASIN": self._configuration["basin_mapping"]})
-        lines_df = lines_df.replace(
-            {"SUBBASIN": self._configuration["subbasin_mapping"]}
-        )
+        with self.instrumentation.stage("download"):
+            if self._download_cache:
+                csv_file, csv_changed = self._download_cache.download_file(
+                    csv_url, version
+                )
+                lines_file, lines_changed = self._download_cache.download_file(
+                    lines_url, version
+                )
+            else:
+                csv_file = self._retriever.download_file(csv_url)
+                lines_file = self._retriever.download_file(lines_url)
+        if self._download_cache and not csv_changed and not lines_changed:
+            logger.info(f"IBTrACS {version} unchanged since last published run")
+            return False
+        if self._checkpoint:
+            if self._download_cache:
+                csv_hash = self._download_cache.get_hash(csv_url)
+                lines_hash = self._download_cache.get_hash(lines_url)
+            else:
+                csv_hash = hash_file(csv_file)
+                lines_hash = hash_file(lines_file)
+            self._checkpoint.start(
+                {
+                    "version": version,
+                    "csv": csv_hash,
+                    "lines": lines_hash,
+                    "writers": {
+                        key: self._configuration.get(key) for key in _WRITER_SETTINGS
+                    },
+                }
+            )
+        code_mappings = {
+            "NATURE": self._configuration["nature_mapping"],
+            "BASIN": self._configuration["basin_mapping"],
+            "SUBBASIN": self._configuration["subbasin_mapping"],
+        }
+        with self.instrumentation.stage("parse_lines") as record:
+            lines_df = read_ibtracs_lines(
+                lines_file,
+                f"IBTrACS.ALL.list.{version}.lines.shp",
+                self._configuration["columns_subset"],
+                code_mappings,
+            )
+            record["features"] = len(lines_df)
 
-        ibtracs_df = read_csv(
-            csv_file,
-            sep=",",
-            keep_default_na=False,
-            usecols=self._configuration["columns_subset"],
-            low_memory=False,
-        )
-        ibtracs_df = ibtracs_df.replace(
-            {"NATURE": self._configuration["nature_mapping"]}
-        )
-        ibtracs_df = ibtracs_df.replace({"BASIN": self._configuration["basin_mapping"]})
-        ibtracs_df = ibtracs_df.replace(
-            {"SUBBASIN": self._configuration["subbasin_mapping"]}
-        )
+        with self.instrumentation.stage("parse_csv") as record:
+            self.units, ibtracs_df = read_ibtracs_csv(
+                csv_file,
+                self._configuration["columns_subset"],
+                self._configuration["column_types"],
+                self._configuration.get("csv_engine", "c"),
+            )
+            for column, mapping in code_mappings.items():
+                map_codes(ibtracs_df, column, mapping)
+            self.iso_times = parse_iso_times(ibtracs_df["ISO_TIME"])
+            self.storm_times = get_storm_times(ibtracs_df["SID"], self.iso_times)
+            record["rows"] = len(ibtracs_df)
         dict_of_dicts_add(self.data, "world", "csv", ibtracs_df)
         dict_of_dicts_add(self.data, "world", "geo", lines_df)
-        return
+        return True
 
     def process_countries(self) -> List[str]:
         logger.info("Downloading global boundary")
-        global_boundary = self.download_global_boundary()
-        global_data = self.data["world"]["csv"][1:]
+        with self.instrumentation.stage("boundary_download"):
+            boundary_path = self.download_global_boundary_file()
+        distance = self._configuration["buffer_distance"]
+        engine = self._configuration.get("country_engine", "strtree")
+        world_df = self.data["world"]["csv"]
+        self._csv_index = StormIndex(world_df)
+        self._geo_index = StormIndex(self.data["world"]["geo"])
+
+        cache_key = None
+        if self._geometry_cache or self._run_state or self._checkpoint:
+            cache_key = GeometryCache.get_key(boundary_path, distance, _CRS)
+            self._membership_key = f"{engine}:{cache_key}"
+        previous = None
+        if self._run_state:
+            self._digests = get_storm_digests(world_df, self._csv_index)
+            if self._incremental:
+                previous = self._run_state.load(self._membership_key)
+        if self._checkpoint:
+            checkpointed = self._checkpoint.load_membership(self._membership_key)
+            if checkpointed:
+                membership, countries, countryiso3s = checkpointed
+                self._add_country_sids(membership, countries)
+                return countryiso3s
+        if previous:
+            changed, removed = get_changed_sids(previous, self._digests)
+            points_df = self._csv_index.take(world_df, changed)
+        else:
+            points_df = world_df
         geo_df = geopandas.GeoDataFrame(
-            global_data,
-            geometry=geopandas.points_from_xy(global_data.LON, global_data.LAT),
+            points_df,
+            geometry=geopandas.points_from_xy(points_df.LON, points_df.LAT),
             crs="EPSG:4326",
         )
-        geo_df = geo_df.to_crs(crs="ESRI:54009")
+        geographic = engine in GEOGRAPHIC_ENGINES
+        if not geographic:
+            geo_df = geo_df.to_crs(crs=_CRS)
 
-        for iso3 in global_boundary["ISO_3"].unique():
-            if not iso3 or iso3[0] == "X" or iso3 in ["ATA", "CAN", "RUS", "USA"]:
-                continue
-            logger.info(f"Processing {iso3}")
-            country_lyr = global_boundary[global_boundary["ISO_3"] == iso3]
-            country_lyr.loc[:, "geometry"] = country_lyr.geometry.buffer(
-                distance=2000000
+        global_boundary = None
+        countries = None
+        with self.instrumentation.stage("boundary_prep") as record:
+            if engine in BUFFERED_ENGINES:
+                countries = self.get_buffered_countries(
+                    boundary_path, distance, cache_key
+                )
+                iso3s = list(countries["ISO_3"])
+                record["features"] = len(countries)
+            else:
+                global_boundary = read_global_boundary(
+                    boundary_path, "EPSG:4326" if geographic else _CRS
+                )
+                iso3s = list(global_boundary["ISO_3"].unique())
+                record["features"] = len(global_boundary)
+        with self.instrumentation.stage("assign_countries") as record:
+            record["rows"] = len(geo_df)
+            if len(geo_df) == 0:
+                membership = {}
+            else:
+                membership = get_membership(
+                    geo_df, global_boundary, distance, engine, countries=countries
+                )
+        affected = None
+        if previous:
+            # Storms not new, changed or removed keep their previous countries
+            affected = set()
+            for sid in changed | removed:
+                affected.update(membership.get(sid, set()))
+                affected.update(previous["membership"].get(sid, set()))
+            for sid, previous_iso3s in previous["membership"].items():
+                if sid in changed or sid in removed:
+                    continue
+                membership[sid] = previous_iso3s
+        countries = self._add_country_sids(membership, iso3s)
+
+        if affected is None:
+            countryiso3s = list(self.data.keys())
+        else:
+            logger.info(f"{len(affected)} countries affected by changed storms")
+            countryiso3s = ["world"] + [iso3 for iso3 in countries if iso3 in affected]
+        if self._checkpoint:
+            self._checkpoint.save_membership(
+                self._membership_key, membership, countries, countryiso3s
             )
-            country_lyr = country_lyr.dissolve()
-            country_lyr = country_lyr.explode()
-            joined_lyr = geopandas.overlay(geo_df, country_lyr, how="intersection")
-            if len(joined_lyr) == 0:
-                continue
-            sid_list = joined_lyr["SID"].unique()
-            country_data = self.data["world"]["csv"][
-                self.data["world"]["csv"]["SID"].isin(sid_list)
-            ]
-            country_data = concat([self.data["world"]["csv"][0:1], country_data])
-            geo_data = self.data["world"]["geo"][
-                self.data["world"]["geo"]["SID"].isin(sid_list)
-            ]
-            dict_of_dicts_add(self.data, iso3, "csv", country_data)
-            dict_of_dicts_add(self.data, iso3, "geo", geo_data)
-
-        return list(self.data.keys())
-
-    def download_global_boundary(self):
+        return countryiso3s
+
+    def _add_country_sids(
+        self, membership: Dict[str, Set[str]], iso3s: List[str]
+    ) -> List[str]:
+        self._membership = membership
+        country_sids = get_country_sids(membership, iso3s)
+        for iso3, sid_list in country_sids.items():
+            logger.info(f"Processing {iso3}")
+            dict_of_dicts_add(self.data, iso3, "sids", sid_list)
+        return list(country_sids)
+
+    def save_state(self) -> None:
+        if self._download_cache:
+            self._download_cache.mark_published()
+        if self._run_state:
+            self._run_state.save(self._membership_key, self._digests, self._membership)
+
+    def get_frames(self, countryiso3: str) -> Tuple[DataFrame, geopandas.GeoDataFrame]:
+        if countryiso3 == "world":
+            return self.data["world"]["csv"], self.data["world"]["geo"]
+        sids = self.data[countryiso3]["sids"]
+        return (
+            self._csv_index.take(self.data["world"]["csv"], sids),
+            self._geo_index.take(self.data["world"]["geo"], sids),
+        )
+
+    def get_buffered_countries(
+        self, boundary_path: str, distance: float, key: Optional[str] = None
+    ) -> geopandas.GeoDataFrame:
+        if self._geometry_cache is None:
+            return buffer_boundaries(read_global_boundary(boundary_path), distance)
+        if key is None:
+            key = GeometryCache.get_key(boundary_path, distance, _CRS)
+        countries = self._geometry_cache.load(key)
+        if countries is None:
+            countries = buffer_boundaries(read_global_boundary(boundary_path), distance)
+            self._geometry_cache.save(key, countries)
+        return countries
+
+    def download_global_boundary_file(self) -> str:
         dataset_info = self._configuration["global_boundaries"]
         dataset = Dataset.read_from_hdx(dataset_info["dataset"])
         resource = [
@@ -215,26 +529,81 @@ class Ibtracs:
                 self._retriever.saved_dir if self._retriever.save else self._temp_dir
             )
             _, file_path = resource.download(folder)
-        lyr = geopandas.read_file(file_path)
-        lyr = lyr.replace({numpy.nan: None})
-        lyr = lyr.to_crs(crs="ESRI:54009")
-        for i, row in lyr.iterrows():
-            if not lyr.geometry[i].is_valid:
-                lyr.loc[i, "geometry"] = make_valid(lyr.geometry[i])
-            if row["STATUS"] and row["STATUS"][:4] == "Adm.":
-                lyr.loc[i, "ISO_3"] = row["Color_Code"]
-        lyr = lyr.drop(
-            [f for f in lyr.columns if f.lower() not in ["iso_3", "geometry"]],
-            axis=1,
-        )
-        return lyr
+        return file_path
+
+
+def read_global_boundary(file_path: str, crs: str = _CRS) -> geopandas.GeoDataFrame:
+    lyr = geopandas.read_file(file_path)
+    return clean_global_boundary(lyr, crs)
+
+
+def clean_global_boundary(
+    lyr: geopandas.GeoDataFrame, crs: str = _CRS
+) -> geopandas.GeoDataFrame:
+    lyr = lyr.replace({numpy.nan: None})
+    lyr = lyr.to_crs(crs=crs)
+    geometries = lyr.geometry.values
+    invalid = ~shapely.is_valid(geometries)
+    if invalid.any():
+        lyr.loc[invalid, "geometry"] = shapely.make_valid(geometries[invalid])
+    # Areas administered by another country take that country's ISO3
+    administered = lyr["STATUS"].str.startswith("Adm.", na=False).astype(bool)
+    lyr.loc[administered, "ISO_3"] = lyr.loc[administered, "Color_Code"]
+    lyr = lyr.drop(
+        [f for f in lyr.columns if f.lower() not in ["iso_3", "geometry"]],
+        axis=1,
+    )
+    return lyr
+
+
+def parse_iso_times(iso_times: Series) -> Series:
+    times = to_datetime(iso_times, format=_ISO_TIME_FORMAT, errors="coerce", utc=True)
+    # Fall back to parse_date for any times not in the standard format
+    unparsed = times.isna()
+    if unparsed.any():
+        fallback = {d: parse_date(d) for d in iso_times[unparsed].unique()}
+        times[unparsed] = to_datetime(iso_times[unparsed].map(fallback), utc=True)
+    return times
+
+
+def get_storm_times(sids: Series, iso_times: Series) -> DataFrame:
+    storm_times = DataFrame({"SID": sids, "ISO_TIME": iso_times})
+    storm_times = storm_times.groupby("SID", sort=False)["ISO_TIME"].agg(["min", "max"])
+    return storm_times.rename(columns={"min": "start", "max": "end"})
+
+
+def get_filenames(countryiso3: str) -> Tuple[str, str]:
+    file_loc = "" if countryiso3 == "world" else f"_{countryiso3}"
+    return (
+        f"ibtracs_ALL_list_v04r01{file_loc}.csv",
+        f"ibtracs_ALL_list_v04r01_lines{file_loc}.geojson",
+    )
+
+
+def get_columnar_filenames(countryiso3: str) -> Tuple[str, str]:
+    file_loc = "" if countryiso3 == "world" else f"_{countryiso3}"
+    return (
+        f"ibtracs_ALL_list_v04r01_points{file_loc}.parquet",
+        f"ibtracs_ALL_list_v04r01_lines{file_loc}.fgb",
+    )
+
+
+def _write_files(countryiso3: str) -> List[Dict]:
+    # Runs in a forked worker with the Ibtracs object inherited from the parent.
+    # Returns the stage records of this call for the parent to add.
+    records = _worker_ibtracs.instrumentation.records
+    start = len(records)
+    _worker_ibtracs.write_files(countryiso3)
+    return records[start:]
 
 
 def check_dataset_date(dataset_name: str, end_date: date) -> bool:
-    dataset = Dataset.read_from_hdx(dataset_name)
-    if not dataset:
+    return is_updated(end_date, get_dataset_end_date(dataset_name))
+
+
+def is_updated(end_date: date, dataset_date: Optional[date]) -> bool:
+    if dataset_date is None:
         return True
-    dataset_date = dataset.get_time_period()["enddate"]
     if end_date.date() > dataset_date.date():
         return True
     return False
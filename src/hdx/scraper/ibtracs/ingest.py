@@ -0,0 +1,132 @@
+"""Typed reading of the IBTrACS CSV and lines shapefile"""
+
+import logging
+from importlib.util import find_spec
+from os.path import abspath
+from typing import Dict, Tuple
+
+import geopandas
+from geopandas import GeoDataFrame
+from pandas import DataFrame, read_csv
+
+logger = logging.getLogger(__name__)
+
+# IBTrACS writes missing values as a single space
+MISSING_VALUE = " "
+
+
+def read_ibtracs_csv(
+    path: str,
+    columns: list,
+    column_types: Dict[str, str],
+    engine: str = "c",
+) -> Tuple[DataFrame, DataFrame]:
+    """Read the IBTrACS CSV into typed columns. The units row that follows the
+    header is read separately as strings so that numeric columns can be
+    parsed as numbers with missing values and code columns as categoricals.
+
+    Args:
+        path (str): Path to IBTrACS CSV
+        columns (list): Columns to read
+        column_types (Dict[str, str]): Mapping of column to dtype. Other columns are read as strings.
+        engine (str): c or python for read_csv or pyarrow to use pyarrow.csv. Defaults to c.
+
+    Returns:
+        Tuple[DataFrame, DataFrame]: Units row and data rows
+    """
+    units = read_csv(
+        path,
+        sep=",",
+        dtype=str,
+        keep_default_na=False,
+        nrows=1,
+    )
+    names = list(units.columns)
+    units = units[[column for column in names if column in columns]]
+    dtype = {column: column_types.get(column, str) for column in units.columns}
+    if engine == "pyarrow":
+        ibtracs_df = _read_pyarrow(path, list(units.columns), dtype)
+    else:
+        ibtracs_df = read_csv(
+            path,
+            sep=",",
+            header=None,
+            names=names,
+            skiprows=2,
+            usecols=list(units.columns),
+            dtype=dtype,
+            keep_default_na=False,
+            na_values=[MISSING_VALUE],
+            engine=engine,
+        )
+    logger.info(f"Read {len(ibtracs_df)} rows from {path}")
+    return units, ibtracs_df
+
+
+def _read_pyarrow(path: str, columns: list, dtype: Dict[str, str]) -> DataFrame:
+    from pyarrow import csv, string
+
+    table = csv.read_csv(
+        path,
+        read_options=csv.ReadOptions(skip_rows_after_names=1),
+        convert_options=csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: string() for column in columns},
+            null_values=[MISSING_VALUE],
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas().astype(dtype)
+
+
+def read_ibtracs_lines(
+    zip_path: str,
+    shapefile: str,
+    columns: list,
+    mappings: Dict[str, Dict[str, str]],
+) -> GeoDataFrame:
+    """Read the IBTrACS lines shapefile in place from its zip through GDAL's
+    virtual zip filesystem. Arrow is used for reading when pyarrow is
+    installed. Code columns are read as categoricals with their codes
+    expanded into descriptions.
+
+    Args:
+        zip_path (str): Path to zip containing lines shapefile
+        shapefile (str): Name of shapefile within zip
+        columns (list): Columns to read
+        mappings (Dict[str, Dict[str, str]]): Mapping of code column to code descriptions
+
+    Returns:
+        GeoDataFrame: Storm track lines
+    """
+    lines_df = geopandas.read_file(
+        f"/vsizip/{abspath(zip_path)}/{shapefile}",
+        columns=columns,
+        engine="pyogrio",
+        use_arrow=find_spec("pyarrow") is not None,
+    )
+    for column, mapping in mappings.items():
+        lines_df[column] = lines_df[column].astype("category")
+        map_codes(lines_df, column, mapping)
+    logger.info(f"Read {len(lines_df)} lines from {shapefile}")
+    return lines_df
+
+
+def map_codes(df: DataFrame, column: str, mapping: Dict[str, str]) -> None:
+    """Expand the codes in a column into their descriptions in place. For
+    categorical columns only the categories are renamed.
+
+    Args:
+        df (DataFrame): DataFrame to update
+        column (str): Column containing codes
+        mapping (Dict[str, str]): Mapping of code to description
+
+    Returns:
+        None
+    """
+    if df[column].dtype == "category":
+        df[column] = df[column].cat.rename_categories(
+            lambda code: mapping.get(code, code)
+        )
+    else:
+        df[column] = df[column].replace(mapping)
@@ -0,0 +1,256 @@
+"""Timing, memory and profiling instrumentation of scraper stages"""
+
+import cProfile
+import json
+import logging
+import platform
+import resource
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from os import makedirs
+from os.path import join
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILERS = ["cprofile", "pyinstrument"]
+
+
+def read_peak_rss() -> float:
+    """Get the peak resident set size of this process in MB. On Linux this is
+    the peak since the last reset_peak_rss, elsewhere since the process
+    started.
+
+    Returns:
+        float: Peak RSS in MB
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() == "Darwin":
+        return usage / 1048576
+    return usage / 1024
+
+
+def reset_peak_rss() -> None:
+    """Reset the peak resident set size of this process to its current size
+    where supported (Linux)
+
+    Returns:
+        None
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class Instrumentation:
+    """Records the wall time, CPU time, peak memory and row or feature counts
+    of named stages of a run and writes them as a JSON run report. Stages can
+    be nested, in which case the peak memory of an inner stage also counts
+    towards the outer one. Optionally profiles the stages of one country with
+    cProfile or pyinstrument, writing the profiles to a folder.
+
+    Args:
+        profile_country (Optional[str]): ISO3 code or world to profile. Defaults to None.
+        profile_dir (str): Folder for profiles. Defaults to "profiles".
+        profiler (str): One of cprofile or pyinstrument. Defaults to cprofile.
+    """
+
+    def __init__(
+        self,
+        profile_country: Optional[str] = None,
+        profile_dir: str = "profiles",
+        profiler: str = "cprofile",
+    ):
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profiler}!")
+        self._profile_country = profile_country
+        self._profile_dir = profile_dir
+        self._profiler = profiler
+        self._records = []
+        self._peaks = []
+        self._started = datetime.now(timezone.utc)
+        self._start_time = time.perf_counter()
+        reset_peak_rss()
+
+    @property
+    def records(self) -> List[Dict]:
+        """Records of completed stages in order of completion
+
+        Returns:
+            List[Dict]: Stage records
+        """
+        return self._records
+
+    def add_records(self, records: List[Dict]) -> None:
+        """Add records of stages run elsewhere, for example in a worker process
+
+        Args:
+            records (List[Dict]): Stage records
+
+        Returns:
+            None
+        """
+        self._records.extend(records)
+
+    @contextmanager
+    def stage(
+        self, name: str, countryiso3: Optional[str] = None, concurrent: bool = False
+    ) -> Iterator[Dict]:
+        """Context manager that records a stage. Row and feature counts can
+        be added to the yielded record as rows and features. A concurrent
+        stage runs in a thread alongside other stages so records the CPU time
+        of its thread and no peak memory.
+
+        Args:
+            name (str): Name of stage
+            countryiso3 (Optional[str]): ISO3 code or world the stage is for. Defaults to None.
+            concurrent (bool): Whether the stage runs in a thread. Defaults to False.
+
+        Returns:
+            Iterator[Dict]: Record of stage
+        """
+        record = {"name": name}
+        if countryiso3:
+            record["country"] = countryiso3
+        if concurrent:
+            with self._concurrent_stage(record):
+                yield record
+            return
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], read_peak_rss())
+        reset_peak_rss()
+        self._peaks.append(read_peak_rss())
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - wall_start, 3)
+            record["cpu_seconds"] = round(time.process_time() - cpu_start, 3)
+            peak = max(self._peaks.pop(), read_peak_rss())
+            record["peak_rss_mb"] = round(peak, 1)
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            self._records.append(record)
+            counts = ", ".join(
+                f"{record[key]} {key}" for key in ("rows", "features") if key in record
+            )
+            logger.info(
+                f"Stage {name}{f' for {countryiso3}' if countryiso3 else ''} took "
+                f"{record['wall_seconds']}s wall, {record['cpu_seconds']}s CPU, "
+                f"peak RSS {record['peak_rss_mb']}MB{f', {counts}' if counts else ''}"
+            )
+
+    @contextmanager
+    def _concurrent_stage(self, record: Dict) -> Iterator[None]:
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - wall_start, 3)
+            record["cpu_seconds"] = round(time.thread_time() - cpu_start, 3)
+            self._records.append(record)
+            country = record.get("country")
+            logger.info(
+                f"Stage {record['name']}{f' for {country}' if country else ''} took "
+                f"{record['wall_seconds']}s wall, {record['cpu_seconds']}s CPU"
+            )
+
+    def profile(self, countryiso3: str, label: str):
+        """Context manager that profiles its body if the country is the one
+        chosen for profiling, otherwise does nothing
+
+        Args:
+            countryiso3 (str): ISO3 code or world
+            label (str): Label of what is profiled, used in the profile filename
+
+        Returns:
+            ContextManager: Profiling context manager
+        """
+        if countryiso3 != self._profile_country:
+            return nullcontext()
+        return self._run_profiler(f"profile_{countryiso3}_{label}")
+
+    @contextmanager
+    def _run_profiler(self, filename: str) -> Iterator[None]:
+        makedirs(self._profile_dir, exist_ok=True)
+        if self._profiler == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path = join(self._profile_dir, f"{filename}.html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+                logger.info(f"Wrote profile to {path}")
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = join(self._profile_dir, f"{filename}.prof")
+            profiler.dump_stats(path)
+            logger.info(f"Wrote profile to {path}")
+
+    def get_report(self) -> Dict:
+        """Get the run report of all recorded stages with totals per stage
+        name
+
+        Returns:
+            Dict: Run report
+        """
+        totals = {}
+        for record in self._records:
+            total = totals.setdefault(
+                record["name"], {"count": 0, "wall_seconds": 0, "cpu_seconds": 0}
+            )
+            total["count"] += 1
+            total["wall_seconds"] = round(
+                total["wall_seconds"] + record["wall_seconds"], 3
+            )
+            total["cpu_seconds"] = round(
+                total["cpu_seconds"] + record["cpu_seconds"], 3
+            )
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        peaks = [
+            record["peak_rss_mb"] for record in self._records if "peak_rss_mb" in record
+        ]
+        return {
+            "started": self._started.isoformat(),
+            "finished": datetime.now(timezone.utc).isoformat(),
+            "wall_seconds": round(time.perf_counter() - self._start_time, 3),
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+            "peak_rss_mb": round(max(peaks + [read_peak_rss()]), 1),
+            "stages": self._records,
+            "totals": totals,
+        }
+
+    def write_report(self, path: str) -> None:
+        """Write the run report as JSON
+
+        Args:
+            path (str): Path to report
+
+        Returns:
+            None
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.get_report(), f, indent=2)
+        logger.info(f"Wrote run report to {path}")
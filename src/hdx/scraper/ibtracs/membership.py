@@ -0,0 +1,469 @@
+"""Assignment of storms to the countries they pass near"""
+
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+import geopandas
+import numpy
+import shapely
+from geopandas import GeoDataFrame
+from shapely import STRtree
+
+logger = logging.getLogger(__name__)
+
+# Countries too large to buffer by the full distance in reasonable time. Only
+# the distance and haversine engines, which do not buffer, process them.
+_LARGE_COUNTRIES = ["ATA", "CAN", "RUS", "USA"]
+_EARTH_RADIUS = 6371008.8  # Mean radius in metres
+
+
+def include_country(iso3: str, include_large: bool = False) -> bool:
+    """Whether a country from the boundary layer should get its own dataset
+
+    Args:
+        iso3 (str): ISO3 code from the boundary layer
+        include_large (bool): Whether to include countries in _LARGE_COUNTRIES. Defaults to False.
+
+    Returns:
+        bool: True if the country should be processed
+    """
+    if not iso3 or iso3[0] == "X":
+        return False
+    if iso3 in _LARGE_COUNTRIES and not include_large:
+        return False
+    return True
+
+
+def subdivide(geometries: numpy.ndarray, max_vertices: int = 256) -> numpy.ndarray:
+    """Split geometries into parts of at most max_vertices coordinates by
+    recursively halving the bounds of larger parts along their longer side,
+    so that distances to a huge country are computed against a few small
+    nearby parts rather than its whole outline
+
+    Args:
+        geometries (numpy.ndarray): Geometries to split
+        max_vertices (int): Maximum coordinates per part. Defaults to 256.
+
+    Returns:
+        numpy.ndarray: Parts that together cover the geometries
+    """
+    parts = []
+    stack = list(shapely.get_parts(geometries))
+    while stack:
+        part = stack.pop()
+        if shapely.is_empty(part):
+            continue
+        xmin, ymin, xmax, ymax = part.bounds
+        width = xmax - xmin
+        height = ymax - ymin
+        if shapely.get_num_coordinates(part) <= max_vertices or max(width, height) < 1:
+            parts.append(part)
+            continue
+        if width >= height:
+            middle = xmin + width / 2
+            halves = ((xmin, ymin, middle, ymax), (middle, ymin, xmax, ymax))
+        else:
+            middle = ymin + height / 2
+            halves = ((xmin, ymin, xmax, middle), (xmin, middle, xmax, ymax))
+        for half in halves:
+            stack.extend(shapely.get_parts(shapely.clip_by_rect(part, *half)))
+    return numpy.array(parts, dtype=object)
+
+
+def buffer_boundaries(boundaries: GeoDataFrame, distance: float) -> GeoDataFrame:
+    """Buffer and dissolve the boundary layer into one polygon per country,
+    keeping the order in which countries first appear in the layer
+
+    Args:
+        boundaries (GeoDataFrame): Boundary layer with ISO_3 and geometry
+        distance (float): Buffer distance in units of the layer's CRS
+
+    Returns:
+        GeoDataFrame: One buffered row per included country
+    """
+    countries = boundaries[boundaries["ISO_3"].map(include_country)]
+    countries = countries.set_geometry(countries.geometry.buffer(distance))
+    countries = countries.dissolve(by="ISO_3", sort=False).reset_index()
+    return countries[["ISO_3", "geometry"]]
+
+
+def overlay_membership(
+    points: GeoDataFrame, boundaries: GeoDataFrame, distance: float
+) -> Dict[str, Set[str]]:
+    """Find the countries each storm passes near by buffering each country and
+    overlaying all track points against it in turn
+
+    Args:
+        points (GeoDataFrame): Track points with a SID column
+        boundaries (GeoDataFrame): Boundary layer in the same CRS as points
+        distance (float): Buffer distance in units of the layer's CRS
+
+    Returns:
+        Dict[str, Set[str]]: Mapping of SID to set of ISO3 codes
+    """
+    membership = {}
+    for iso3 in boundaries["ISO_3"].unique():
+        if not include_country(iso3):
+            continue
+        country_lyr = boundaries[boundaries["ISO_3"] == iso3]
+        country_lyr.loc[:, "geometry"] = country_lyr.geometry.buffer(distance=distance)
+        country_lyr = country_lyr.dissolve()
+        country_lyr = country_lyr.explode()
+        joined_lyr = geopandas.overlay(points, country_lyr, how="intersection")
+        for sid in joined_lyr["SID"].unique():
+            membership.setdefault(sid, set()).add(iso3)
+    return membership
+
+
+def strtree_membership(
+    points: GeoDataFrame, countries: GeoDataFrame
+) -> Dict[str, Set[str]]:
+    """Find the countries each storm passes near with a single bulk query of
+    all track points against a spatial index of buffered countries
+
+    Args:
+        points (GeoDataFrame): Track points with a SID column
+        countries (GeoDataFrame): Buffered countries from buffer_boundaries
+
+    Returns:
+        Dict[str, Set[str]]: Mapping of SID to set of ISO3 codes
+    """
+    logger.info(f"Querying {len(points)} points against {len(countries)} countries")
+    tree = STRtree(countries.geometry.values)
+    point_index, country_index = tree.query(
+        points.geometry.values, predicate="intersects"
+    )
+    sids = points["SID"].to_numpy()[point_index]
+    iso3s = countries["ISO_3"].to_numpy()[country_index]
+    membership = {}
+    for sid, iso3 in set(zip(sids, iso3s)):
+        membership.setdefault(sid, set()).add(iso3)
+    return membership
+
+
+def distance_membership(
+    points: GeoDataFrame,
+    boundaries: GeoDataFrame,
+    distance: float,
+    max_vertices: int = 256,
+) -> Dict[str, Set[str]]:
+    """Find the countries each storm passes within a distance of without
+    buffering. Each country is subdivided into small parts indexed in its own
+    spatial index. Points within the distance of the country's bounds are
+    then queried for their nearest part within the distance. As no buffered
+    polygons are built, countries of any size are processed.
+
+    Args:
+        points (GeoDataFrame): Track points with a SID column
+        boundaries (GeoDataFrame): Boundary layer in the same CRS as points
+        distance (float): Distance in units of the layer's CRS
+        max_vertices (int): Maximum coordinates per country part. Defaults to 256.
+
+    Returns:
+        Dict[str, Set[str]]: Mapping of SID to set of ISO3 codes
+    """
+    point_geometries = points.geometry.values
+    xs = shapely.get_x(point_geometries)
+    ys = shapely.get_y(point_geometries)
+    sids = points["SID"].to_numpy()
+    membership = {}
+    for iso3, country in boundaries.groupby("ISO_3", sort=False):
+        if not include_country(iso3, include_large=True):
+            continue
+        parts = subdivide(country.geometry.values, max_vertices)
+        if len(parts) == 0:
+            continue
+        xmin, ymin, xmax, ymax = shapely.total_bounds(parts)
+        candidates = numpy.flatnonzero(
+            (xs >= xmin - distance)
+            & (xs <= xmax + distance)
+            & (ys >= ymin - distance)
+            & (ys <= ymax + distance)
+        )
+        if len(candidates) == 0:
+            continue
+        logger.info(
+            f"Querying {len(candidates)} points against {len(parts)} parts of {iso3}"
+        )
+        tree = STRtree(parts)
+        point_index, _ = tree.query_nearest(
+            point_geometries[candidates], max_distance=distance, all_matches=False
+        )
+        for sid in numpy.unique(sids[candidates[point_index]]):
+            membership.setdefault(sid, set()).add(iso3)
+    return membership
+
+
+def to_unit_vectors(lons: numpy.ndarray, lats: numpy.ndarray) -> numpy.ndarray:
+    """Convert longitudes and latitudes in degrees to 3D unit vectors
+
+    Args:
+        lons (numpy.ndarray): Longitudes
+        lats (numpy.ndarray): Latitudes
+
+    Returns:
+        numpy.ndarray: Array of shape (n, 3)
+    """
+    lons = numpy.radians(lons)
+    lats = numpy.radians(lats)
+    cos_lats = numpy.cos(lats)
+    return numpy.column_stack(
+        (cos_lats * numpy.cos(lons), cos_lats * numpy.sin(lons), numpy.sin(lats))
+    )
+
+
+def sample_boundary(geometries: numpy.ndarray, spacing: float) -> numpy.ndarray:
+    """Sample points along the rings of polygons in longitude and latitude
+    so that consecutive samples of a ring are at most spacing metres apart
+    along it. Every point of the rings is then within spacing / 2 metres of a
+    sample. Rings are densified to half the spacing and the first vertex in
+    each half spacing of length along a ring kept, which takes time linear in
+    the number of vertices however jagged the rings. Samples are returned in
+    ring order so runs of them are compact.
+
+    Args:
+        geometries (numpy.ndarray): Polygons in EPSG:4326
+        spacing (float): Maximum spacing of samples in metres
+
+    Returns:
+        numpy.ndarray: Longitudes and latitudes of shape (n, 2)
+    """
+    rings = shapely.get_rings(shapely.get_parts(geometries))
+    if len(rings) == 0:
+        return numpy.empty((0, 2))
+    # A path is never longer on the sphere than in the plane of longitude and
+    # latitude so a spacing in degrees of latitude bounds the true spacing
+    half_spacing = numpy.degrees(spacing / _EARTH_RADIUS) / 2
+    rings = shapely.segmentize(rings, half_spacing)
+    coordinates, ring_index = shapely.get_coordinates(rings, return_index=True)
+    new_ring = ring_index[1:] != ring_index[:-1]
+    steps = numpy.hypot(*numpy.diff(coordinates, axis=0).T)
+    steps[new_ring] = 0
+    bins = numpy.floor(numpy.concatenate(([0], numpy.cumsum(steps))) / half_spacing)
+    keep = numpy.concatenate(([True], new_ring | (bins[1:] != bins[:-1])))
+    return coordinates[keep]
+
+
+def get_caps(
+    vectors: numpy.ndarray, radii: Optional[numpy.ndarray] = None
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Get caps on the unit sphere centred on the normalised means of groups
+    of unit vectors, with the angular radius needed to contain every vector
+    of their group or, if the vectors are centres of caps with the given
+    radii, every one of those caps
+
+    Args:
+        vectors (numpy.ndarray): Unit vectors of shape (groups, size, 3)
+        radii (Optional[numpy.ndarray]): Radii of shape (groups, size). Defaults to None.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: Centres of shape (groups, 3) and angular radii of shape (groups,)
+    """
+    centres = vectors.sum(axis=1)
+    norms = numpy.linalg.norm(centres, axis=1)
+    degenerate = norms < 1e-9
+    centres[degenerate] = vectors[degenerate, 0]
+    centres /= numpy.where(degenerate, 1, norms)[:, None]
+    dots = numpy.einsum("gj,gsj->gs", centres, vectors)
+    angles = numpy.arccos(numpy.clip(dots, -1, 1))
+    if radii is not None:
+        angles += radii
+    return centres, numpy.minimum(angles.max(axis=1), numpy.pi)
+
+
+def _group(values: numpy.ndarray, size: int) -> numpy.ndarray:
+    # Pad with the last value so that every group is full
+    padding = numpy.repeat(values[-1:], -len(values) % size, axis=0)
+    values = numpy.concatenate((values, padding))
+    return values.reshape(-1, size, *values.shape[1:])
+
+
+def build_ball_tree(
+    vectors: numpy.ndarray, branching: int = 16
+) -> List[Tuple[numpy.ndarray, numpy.ndarray]]:
+    """Build a ball tree on the unit sphere over unit vectors by grouping
+    runs of consecutive vectors, then runs of consecutive caps, until one
+    cap is left. Vectors sampled in order along rings give compact caps.
+
+    Args:
+        vectors (numpy.ndarray): Unit vectors of shape (n, 3)
+        branching (int): Children per cap. Defaults to 16.
+
+    Returns:
+        List[Tuple[numpy.ndarray, numpy.ndarray]]: Centres and radii of caps per level from the root down
+    """
+    levels = [get_caps(_group(vectors, branching))]
+    while len(levels[-1][0]) > 1:
+        centres, radii = levels[-1]
+        levels.append(get_caps(_group(centres, branching), _group(radii, branching)))
+    return levels[::-1]
+
+
+def query_ball_tree(
+    point_vectors: numpy.ndarray,
+    vectors: numpy.ndarray,
+    levels: List[Tuple[numpy.ndarray, numpy.ndarray]],
+    theta: float,
+    branching: int = 16,
+) -> numpy.ndarray:
+    """Find which points are within an angle of any of the vectors in a ball
+    tree. Points are compared with the caps of each level in turn. A point
+    is in range of a cap within the angle, out of range of caps beyond it and
+    only compared with the children of the remaining caps.
+
+    Args:
+        point_vectors (numpy.ndarray): Unit vectors of points of shape (n, 3)
+        vectors (numpy.ndarray): Unit vectors in the tree of shape (m, 3)
+        levels (List[Tuple[numpy.ndarray, numpy.ndarray]]): Levels from build_ball_tree
+        theta (float): Angle in radians
+        branching (int): Children per cap used to build the tree. Defaults to 16.
+
+    Returns:
+        numpy.ndarray: Boolean array of whether each point is in range
+    """
+    near = numpy.zeros(len(point_vectors), dtype=bool)
+    pair_points = numpy.arange(len(point_vectors))
+    pair_nodes = numpy.zeros(len(point_vectors), dtype=int)
+    children = [len(centres) for centres, _ in levels[1:]] + [len(vectors)]
+    for (centres, radii), child_count in zip(levels, children):
+        dots = numpy.einsum("pj,pj->p", point_vectors[pair_points], centres[pair_nodes])
+        pair_radii = radii[pair_nodes]
+        within = (pair_radii <= theta) & (
+            dots >= numpy.cos(numpy.maximum(theta - pair_radii, 0))
+        )
+        near[pair_points[within]] = True
+        overlapping = dots >= numpy.cos(numpy.minimum(theta + pair_radii, numpy.pi))
+        remaining = overlapping & ~near[pair_points]
+        pair_points = numpy.repeat(pair_points[remaining], branching)
+        # Children past the end are padding duplicating the last child
+        pair_nodes = numpy.minimum(
+            (pair_nodes[remaining, None] * branching + numpy.arange(branching)).ravel(),
+            child_count - 1,
+        )
+    dots = numpy.einsum("pj,pj->p", point_vectors[pair_points], vectors[pair_nodes])
+    near[pair_points[dots >= numpy.cos(theta)]] = True
+    return near
+
+
+def haversine_membership(
+    points: GeoDataFrame,
+    boundaries: GeoDataFrame,
+    distance: float,
+    spacing: float = 10000,
+    branching: int = 16,
+    batch_size: int = 131072,
+) -> Dict[str, Set[str]]:
+    """Find the countries each storm passes within a great-circle distance of
+    in geographic coordinates. Each country's rings are densely sampled and
+    the samples indexed in a ball tree on the unit sphere that all track
+    points are queried against in batches. Points inside a country are also
+    in range of it. Distances are overestimated by at most spacing / 2.
+
+    Args:
+        points (GeoDataFrame): Track points in EPSG:4326 with a SID column
+        boundaries (GeoDataFrame): Boundary layer in EPSG:4326
+        distance (float): Distance in metres
+        spacing (float): Maximum spacing of boundary samples in metres. Defaults to 10000.
+        branching (int): Children per cap of the ball tree. Defaults to 16.
+        batch_size (int): Points queried at once. Defaults to 131072.
+
+    Returns:
+        Dict[str, Set[str]]: Mapping of SID to set of ISO3 codes
+    """
+    point_geometries = points.geometry.values
+    point_vectors = to_unit_vectors(
+        shapely.get_x(point_geometries), shapely.get_y(point_geometries)
+    )
+    sids = points["SID"].to_numpy()
+    theta = distance / _EARTH_RADIUS
+
+    # Querying with the boundaries prepares them rather than the points
+    tree = STRtree(point_geometries)
+    boundary_index, point_index = tree.query(
+        boundaries.geometry.values, predicate="intersects"
+    )
+    inside_iso3s = boundaries["ISO_3"].to_numpy()[boundary_index]
+
+    membership = {}
+    for iso3, country in boundaries.groupby("ISO_3", sort=False):
+        if not include_country(iso3, include_large=True):
+            continue
+        samples = sample_boundary(country.geometry.values, spacing)
+        if len(samples) == 0:
+            continue
+        vectors = to_unit_vectors(samples[:, 0], samples[:, 1])
+        levels = build_ball_tree(vectors, branching)
+        logger.info(
+            f"Querying {len(points)} points against {len(vectors)} samples of {iso3}"
+        )
+        near = numpy.zeros(len(point_vectors), dtype=bool)
+        for start in range(0, len(point_vectors), batch_size):
+            end = start + batch_size
+            near[start:end] = query_ball_tree(
+                point_vectors[start:end], vectors, levels, theta, branching
+            )
+        near[point_index[inside_iso3s == iso3]] = True
+        for sid in numpy.unique(sids[near]):
+            membership.setdefault(sid, set()).add(iso3)
+    return membership
+
+
+ENGINES = ["overlay", "strtree", "distance", "haversine"]
+# Engines that work from buffered countries so can use the geometry cache
+BUFFERED_ENGINES = ["strtree"]
+# Engines that work in geographic coordinates (EPSG:4326) with distances in
+# metres rather than in the equal area projection
+GEOGRAPHIC_ENGINES = ["haversine"]
+
+
+def get_membership(
+    points: GeoDataFrame,
+    boundaries: Optional[GeoDataFrame],
+    distance: float,
+    engine: str = "strtree",
+    countries: Optional[GeoDataFrame] = None,
+) -> Dict[str, Set[str]]:
+    """Find the countries each storm passes near using the given engine
+
+    Args:
+        points (GeoDataFrame): Track points with a SID column
+        boundaries (Optional[GeoDataFrame]): Boundary layer in the same CRS as points
+        distance (float): Buffer distance in units of the layer's CRS or metres for engines in GEOGRAPHIC_ENGINES
+        engine (str): One of overlay, strtree, distance or haversine. Defaults to strtree.
+        countries (Optional[GeoDataFrame]): Already buffered countries for engines in BUFFERED_ENGINES. Defaults to None.
+
+    Returns:
+        Dict[str, Set[str]]: Mapping of SID to set of ISO3 codes
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown country engine {engine}!")
+    if engine in BUFFERED_ENGINES and countries is None:
+        countries = buffer_boundaries(boundaries, distance)
+    if engine == "overlay":
+        return overlay_membership(points, boundaries, distance)
+    if engine == "distance":
+        return distance_membership(points, boundaries, distance)
+    if engine == "haversine":
+        return haversine_membership(points, boundaries, distance)
+    return strtree_membership(points, countries)
+
+
+def get_country_sids(
+    membership: Dict[str, Set[str]], iso3s: List[str]
+) -> Dict[str, List[str]]:
+    """Invert a SID to ISO3 mapping into ISO3 to SIDs, ordered by the given
+    list of ISO3 codes and dropping countries with no storms
+
+    Args:
+        membership (Dict[str, Set[str]]): Mapping of SID to set of ISO3 codes
+        iso3s (List[str]): ISO3 codes in output order
+
+    Returns:
+        Dict[str, List[str]]: Mapping of ISO3 code to sorted list of SIDs
+    """
+    country_sids = {iso3: [] for iso3 in iso3s}
+    for sid, countries in membership.items():
+        for iso3 in countries:
+            if iso3 in country_sids:
+                country_sids[iso3].append(sid)
+    return {iso3: sorted(sids) for iso3, sids in country_sids.items() if sids}
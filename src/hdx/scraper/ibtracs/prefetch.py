@@ -0,0 +1,92 @@
+"""Concurrent, rate limited reading of dataset metadata from HDX"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from time import monotonic, sleep
+from typing import Dict, List, Optional
+
+from hdx.data.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces out calls from any number of threads so that no more than the
+    given number start per second
+
+    Args:
+        calls_per_second (float): Maximum calls per second
+    """
+
+    def __init__(self, calls_per_second: float):
+        self._interval = 1 / calls_per_second
+        self._lock = Lock()
+        self._next_call = monotonic()
+
+    def wait(self) -> None:
+        """Block until the next call is allowed
+
+        Returns:
+            None
+        """
+        with self._lock:
+            now = monotonic()
+            delay = self._next_call - now
+            self._next_call = max(now, self._next_call) + self._interval
+        if delay > 0:
+            sleep(delay)
+
+
+def get_dataset_end_date(dataset_name: str) -> Optional[datetime]:
+    """Get the end date of a dataset in HDX
+
+    Args:
+        dataset_name (str): Dataset name
+
+    Returns:
+        Optional[datetime]: End date or None if the dataset does not exist
+    """
+    dataset = Dataset.read_from_hdx(dataset_name)
+    if not dataset:
+        return None
+    return dataset.get_time_period()["enddate"]
+
+
+def prefetch_end_dates(
+    dataset_names: List[str], workers: int = 8, calls_per_second: float = 5
+) -> Dict[str, Optional[datetime]]:
+    """Get the end dates of datasets in HDX using a bounded pool of threads
+    with rate limiting. Datasets whose read fails are left out of the result
+    so that they can be checked again later.
+
+    Args:
+        dataset_names (List[str]): Dataset names
+        workers (int): Maximum concurrent requests. Defaults to 8.
+        calls_per_second (float): Maximum requests per second. Defaults to 5.
+
+    Returns:
+        Dict[str, Optional[datetime]]: Mapping of dataset name to end date (None if not in HDX)
+    """
+    rate_limiter = RateLimiter(calls_per_second)
+
+    def get_end_date(dataset_name):
+        rate_limiter.wait()
+        try:
+            return get_dataset_end_date(dataset_name)
+        except Exception as ex:
+            logger.warning(f"Could not read {dataset_name} from HDX: {ex}")
+            raise
+
+    end_dates = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            dataset_name: executor.submit(get_end_date, dataset_name)
+            for dataset_name in dataset_names
+        }
+        for dataset_name, future in futures.items():
+            if future.exception() is None:
+                end_dates[dataset_name] = future.result()
+    logger.info(f"Prefetched {len(end_dates)} of {len(dataset_names)} dataset dates")
+    return end_dates
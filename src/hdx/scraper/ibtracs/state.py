@@ -0,0 +1,123 @@
+"""State of the last successful run for incremental processing"""
+
+import hashlib
+import json
+import logging
+from os import makedirs, replace
+from os.path import dirname, exists
+from typing import Dict, Optional, Set, Tuple
+
+from pandas import DataFrame
+from pandas.util import hash_pandas_object
+
+from hdx.scraper.ibtracs.storm_index import StormIndex
+
+logger = logging.getLogger(__name__)
+
+
+def get_storm_digests(df: DataFrame, index: StormIndex) -> Dict[str, str]:
+    """Get a digest of the rows of each storm so that new and changed storms
+    can be found by comparing with a previous run
+
+    Args:
+        df (DataFrame): Frame with a SID column
+        index (StormIndex): Storm index of the frame
+
+    Returns:
+        Dict[str, str]: Mapping of SID to digest
+    """
+    row_hashes = hash_pandas_object(df, index=False).to_numpy()
+    digests = {}
+    for sid in index.sids:
+        rows = row_hashes[index.get_positions([sid])]
+        digests[sid] = hashlib.blake2b(rows.tobytes(), digest_size=16).hexdigest()
+    return digests
+
+
+class RunState:
+    """Per-SID digests and SID to ISO3 membership from the last successful
+    run, stored as JSON. The membership key identifies the boundaries, buffer
+    distance and engine used so that a change to any of them forces a full
+    run.
+
+    Args:
+        path (str): Path to state file
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def load(self, membership_key: str) -> Optional[Dict]:
+        """Load the state of the last successful run
+
+        Args:
+            membership_key (str): Key of the current boundaries, distance and engine
+
+        Returns:
+            Optional[Dict]: Dictionary with digests and membership or None if no usable state
+        """
+        if not exists(self._path):
+            logger.info("No previous run state, processing all storms")
+            return None
+        with open(self._path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("membership_key") != membership_key:
+            logger.info("Boundaries or engine changed, processing all storms")
+            return None
+        state["membership"] = {
+            sid: set(iso3s) for sid, iso3s in state["membership"].items()
+        }
+        return state
+
+    def save(
+        self,
+        membership_key: str,
+        digests: Dict[str, str],
+        membership: Dict[str, Set[str]],
+    ) -> None:
+        """Save the state of a successful run
+
+        Args:
+            membership_key (str): Key of the boundaries, distance and engine used
+            digests (Dict[str, str]): Mapping of SID to digest
+            membership (Dict[str, Set[str]]): Mapping of SID to set of ISO3 codes
+
+        Returns:
+            None
+        """
+        folder = dirname(self._path)
+        if folder:
+            makedirs(folder, exist_ok=True)
+        state = {
+            "membership_key": membership_key,
+            "digests": digests,
+            "membership": {
+                sid: sorted(iso3s) for sid, iso3s in sorted(membership.items())
+            },
+        }
+        temp_path = f"{self._path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        replace(temp_path, self._path)
+        logger.info(f"Saved run state with {len(digests)} storms")
+
+
+def get_changed_sids(
+    previous: Dict, digests: Dict[str, str]
+) -> Tuple[Set[str], Set[str]]:
+    """Compare storm digests with those of a previous run
+
+    Args:
+        previous (Dict): State of previous run from RunState.load
+        digests (Dict[str, str]): Mapping of SID to digest for this run
+
+    Returns:
+        Tuple[Set[str], Set[str]]: New or changed SIDs and removed SIDs
+    """
+    previous_digests = previous["digests"]
+    changed = {
+        sid for sid, digest in digests.items() if previous_digests.get(sid) != digest
+    }
+    removed = {sid for sid in previous_digests if sid not in digests}
+    logger.info(f"{len(changed)} new or changed storms, {len(removed)} removed")
+    return changed, removed
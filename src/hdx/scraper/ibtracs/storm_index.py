@@ -0,0 +1,69 @@
+"""Index of the rows belonging to each storm"""
+
+from typing import Iterable, List
+
+import numpy
+from pandas import DataFrame, factorize
+
+
+class StormIndex:
+    """Index of the row positions of each storm (SID) in a frame, built with
+    one stable sort so that the rows of any set of storms can be taken from
+    the frame without scanning it.
+
+    Args:
+        df (DataFrame): Frame with a SID column
+    """
+
+    def __init__(self, df: DataFrame):
+        codes, sids = factorize(df["SID"])
+        self._positions = numpy.argsort(codes, kind="stable")
+        self._offsets = numpy.zeros(len(sids) + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(codes, minlength=len(sids)), out=self._offsets[1:])
+        self._sid_codes = {sid: code for code, sid in enumerate(sids)}
+
+    def __len__(self) -> int:
+        return len(self._sid_codes)
+
+    @property
+    def sids(self) -> List[str]:
+        """Storm identifiers in order of first appearance
+
+        Returns:
+            List[str]: Storm identifiers
+        """
+        return list(self._sid_codes)
+
+    def get_positions(self, sids: Iterable[str]) -> numpy.ndarray:
+        """Get the row positions of the given storms in frame order. Storms
+        not in the index are ignored.
+
+        Args:
+            sids (Iterable[str]): Storm identifiers
+
+        Returns:
+            numpy.ndarray: Sorted row positions
+        """
+        slices = []
+        for sid in sids:
+            code = self._sid_codes.get(sid)
+            if code is None:
+                continue
+            slices.append(
+                self._positions[self._offsets[code] : self._offsets[code + 1]]
+            )
+        if not slices:
+            return numpy.array([], dtype=numpy.int64)
+        return numpy.sort(numpy.concatenate(slices))
+
+    def take(self, df: DataFrame, sids: Iterable[str]) -> DataFrame:
+        """Take the rows of the given storms from the frame that was indexed
+
+        Args:
+            df (DataFrame): Frame that was indexed
+            sids (Iterable[str]): Storm identifiers
+
+        Returns:
+            DataFrame: Rows of the given storms in frame order
+        """
+        return df.take(self.get_positions(sids))
@@ -0,0 +1,183 @@
+"""Concurrent uploading of datasets to HDX overlapping their generation"""
+
+import logging
+from os import remove
+from os.path import exists
+from queue import Queue
+from threading import Lock, Semaphore, Thread
+from time import sleep
+from typing import Callable, Dict, List
+
+from hdx.data.dataset import Dataset
+from hdx.data.hdxobject import HDXError
+
+logger = logging.getLogger(__name__)
+
+
+class UploadPipeline:
+    """Uploads datasets on a small pool of threads while the caller keeps
+    generating them. There are queue_size + workers slots for datasets that
+    are generated but not yet uploaded, and a slot is freed once its
+    dataset's upload finishes. Callers reserve a slot before writing a
+    dataset's files, and submitting reserves one if the caller did not, so
+    writing blocks once uploads fall behind. This caps the disk used by
+    written files, as each dataset's resource files are deleted once it is
+    uploaded. A failed upload is retried with exponential backoff. Datasets
+    that still fail are logged and the others carry on, with an error raised
+    on closing.
+
+    The threads are started on the first submission so that they do not exist
+    when processes writing dataset files are forked.
+
+    Args:
+        upload (Callable[[str, Dataset], None]): Function uploading a dataset given its ISO3 code or world
+        workers (int): Number of upload threads. Defaults to 2.
+        queue_size (int): Maximum datasets waiting for an upload thread. Defaults to 2.
+        retries (int): Number of retries of a failed upload. Defaults to 3.
+        retry_delay (float): Seconds before the first retry, doubling for each one after. Defaults to 5.
+        delete_files (bool): Delete resource files once uploaded. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        upload: Callable[[str, Dataset], None],
+        workers: int = 2,
+        queue_size: int = 2,
+        retries: int = 3,
+        retry_delay: float = 5,
+        delete_files: bool = True,
+    ):
+        self._upload = upload
+        self._workers = workers
+        self._queue = Queue()
+        self._slots = Semaphore(queue_size + workers)
+        self._reserved = 0
+        self._retries = retries
+        self._retry_delay = retry_delay
+        self._delete_files = delete_files
+        self._threads = []
+        self._lock = Lock()
+        self._uploaded = []
+        self._failed = {}
+
+    @property
+    def uploaded(self) -> List[str]:
+        """Names of uploaded datasets in order of completion
+
+        Returns:
+            List[str]: Dataset names
+        """
+        return self._uploaded
+
+    @property
+    def failed(self) -> Dict[str, str]:
+        """Datasets whose upload failed after all retries
+
+        Returns:
+            Dict[str, str]: Mapping of dataset name to error
+        """
+        return self._failed
+
+    def __enter__(self) -> "UploadPipeline":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Finish uploading what was generated before the error
+            self._join()
+
+    def reserve(self, blocking: bool = True) -> bool:
+        """Reserve a slot for a dataset before writing its files. The slot is
+        taken by the next submission and freed once that upload finishes.
+
+        Args:
+            blocking (bool): Wait for a slot to be freed. Defaults to True.
+
+        Returns:
+            bool: Whether a slot was reserved
+        """
+        if not self._slots.acquire(blocking):
+            return False
+        with self._lock:
+            self._reserved += 1
+        return True
+
+    def submit(self, countryiso3: str, dataset: Dataset) -> None:
+        """Queue a dataset for upload, taking a reserved slot or blocking
+        until one is free
+
+        Args:
+            countryiso3 (str): ISO3 code or world
+            dataset (Dataset): Dataset with files to upload
+
+        Returns:
+            None
+        """
+        if not self._threads:
+            for _ in range(self._workers):
+                thread = Thread(target=self._run, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        with self._lock:
+            reserved = self._reserved > 0
+            if reserved:
+                self._reserved -= 1
+        if not reserved:
+            self._slots.acquire()
+        self._queue.put((countryiso3, dataset))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._upload_dataset(*item)
+            finally:
+                self._slots.release()
+
+    def _upload_dataset(self, countryiso3: str, dataset: Dataset) -> None:
+        dataset_name = dataset["name"]
+        delay = self._retry_delay
+        for attempt in range(self._retries + 1):
+            try:
+                self._upload(countryiso3, dataset)
+                break
+            except Exception as ex:
+                if attempt == self._retries:
+                    logger.error(f"Upload of {dataset_name} failed: {ex}")
+                    with self._lock:
+                        self._failed[dataset_name] = str(ex)
+                    return
+                logger.warning(
+                    f"Upload of {dataset_name} failed, retrying in {delay}s: {ex}"
+                )
+                sleep(delay)
+                delay *= 2
+        with self._lock:
+            self._uploaded.append(dataset_name)
+        if self._delete_files:
+            for resource in dataset.get_resources():
+                path = resource.get_file_to_upload()
+                if path and exists(path):
+                    remove(path)
+
+    def _join(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def close(self) -> None:
+        """Wait for queued uploads to finish
+
+        Returns:
+            None
+        """
+        self._join()
+        if self._failed:
+            raise HDXError(f"Failed to upload {', '.join(sorted(self._failed))}!")
+        logger.info(f"Uploaded {len(self._uploaded)} datasets")
@@ -0,0 +1,20 @@
+"""File utilities shared across the scraper"""
+
+import hashlib
+
+
+def hash_file(path: str, chunk_size: int = 1048576) -> str:
+    """Get the SHA-256 hex digest of a file's contents
+
+    Args:
+        path (str): Path to file
+        chunk_size (int): Number of bytes to read at a time. Defaults to 1MB.
+
+    Returns:
+        str: Hex digest
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
@@ -0,0 +1,319 @@
+"""Writers for output resource files"""
+
+import json
+from datetime import date
+from json.encoder import encode_basestring
+from math import isclose, isfinite
+from os.path import basename, splitext
+from typing import Any, List, Optional
+
+import shapely
+from geopandas import GeoDataFrame, points_from_xy
+from pandas import CategoricalDtype, DataFrame, Series, isna
+from pandas.api.types import is_string_dtype
+from shapely.geometry import mapping
+
+from hdx.scraper.ibtracs.ingest import MISSING_VALUE
+
+# Decimal places of coordinates written by GDAL's GeoJSON driver by default
+# and in RFC 7946 mode
+_OGR_PRECISION = 15
+_RFC7946_PRECISION = 7
+_CRS84 = '{ "type": "name", "properties": { "name": "urn:ogc:def:crs:OGC:1.3:CRS84" } }'
+
+
+def format_float(value: float) -> str:
+    """Format a float as its shortest round-trip representation, dropping
+    any trailing .0 so that values are written as they appear in IBTrACS
+
+    Args:
+        value (float): Value to format
+
+    Returns:
+        str: Formatted value
+    """
+    text = repr(float(value))
+    if text.endswith(".0"):
+        return text[:-2]
+    return text
+
+
+def write_csv(
+    df: DataFrame,
+    path: str,
+    units: Optional[DataFrame] = None,
+    chunksize: int = 100000,
+) -> None:
+    """Write a DataFrame straight to a CSV file in chunks, in the same format
+    as Dataset.generate_resource (utf-8, minimal quoting, CRLF line endings)
+    without first converting every row to a dictionary. Missing values are
+    written as in IBTrACS.
+
+    Args:
+        df (DataFrame): DataFrame to write
+        path (str): Path to output file
+        units (Optional[DataFrame]): Units row to write after the header. Defaults to None.
+        chunksize (int): Number of rows to write at a time. Defaults to 100000.
+
+    Returns:
+        None
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        header = True
+        if units is not None:
+            units[list(df.columns)].to_csv(f, index=False, lineterminator="\r\n")
+            header = False
+        df.to_csv(
+            f,
+            header=header,
+            index=False,
+            na_rep=MISSING_VALUE,
+            float_format=format_float,
+            lineterminator="\r\n",
+            chunksize=chunksize,
+        )
+
+
+def format_coordinate(value: float, precision: int) -> str:
+    """Format a coordinate to a number of decimal places, dropping trailing
+    zeros but keeping at least one decimal place as GDAL does
+
+    Args:
+        value (float): Value to format
+        precision (int): Number of decimal places
+
+    Returns:
+        str: Formatted value
+    """
+    text = f"{value:.{precision}f}".rstrip("0")
+    if text.endswith("."):
+        return f"{text}0"
+    return text
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return repr(value) if isfinite(value) else "null"
+    if value is None or isna(value):
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, date):
+        return json.dumps(value.isoformat())
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def _format_column(df: DataFrame, column: str) -> List[str]:
+    series = df[column]
+    if isinstance(series.dtype, CategoricalDtype):
+        categories = [_format_value(category) for category in series.cat.categories]
+        return [categories[code] if code >= 0 else "null" for code in series.cat.codes]
+    values = series.tolist()
+    if series.dtype.kind == "f":
+        return [repr(value) if isfinite(value) else "null" for value in values]
+    if series.dtype.kind in "iu":
+        return [str(value) for value in values]
+    if is_string_dtype(series):
+        return [
+            "null" if value is None or value != value else encode_basestring(value)
+            for value in values
+        ]
+    return [_format_value(value) for value in values]
+
+
+def _format_nested(coordinates: Any, precision: int) -> str:
+    if isinstance(coordinates[0], (int, float)):
+        values = ", ".join(format_coordinate(v, precision) for v in coordinates)
+        return f"[ {values} ]"
+    values = ", ".join(_format_nested(c, precision) for c in coordinates)
+    return f"[ {values} ]"
+
+
+def _format_geometries(geometries: Any, precision: int) -> List[str]:
+    # Consecutive line segments share end points so each distinct point is
+    # formatted once
+    points = {}
+    coordinates = []
+    for point in zip(*shapely.get_coordinates(geometries).T.tolist()):
+        text = points.get(point)
+        if text is None:
+            x, y = point
+            text = f"[ {format_coordinate(x, precision)}, {format_coordinate(y, precision)} ]"
+            points[point] = text
+        coordinates.append(text)
+    type_ids = shapely.get_type_id(geometries).tolist()
+    counts = shapely.get_num_coordinates(geometries).tolist()
+    formatted = []
+    start = 0
+    for i, (type_id, count) in enumerate(zip(type_ids, counts)):
+        end = start + count
+        if type_id < 0 or count == 0:
+            formatted.append("null")
+        elif type_id == 0:
+            formatted.append(
+                f'{{ "type": "Point", "coordinates": {coordinates[start]} }}'
+            )
+        elif type_id == 1:
+            line = ", ".join(coordinates[start:end])
+            formatted.append(f'{{ "type": "LineString", "coordinates": [ {line} ] }}')
+        else:
+            geojson = mapping(geometries[i])
+            nested = _format_nested(geojson["coordinates"], precision)
+            formatted.append(
+                f'{{ "type": "{geojson["type"]}", "coordinates": {nested} }}'
+            )
+        start = end
+    return formatted
+
+
+def write_geojson(
+    geo_df: GeoDataFrame,
+    path: str,
+    precision: Optional[int] = None,
+    rfc7946: bool = False,
+    chunksize: int = 10000,
+) -> None:
+    """Write a GeoDataFrame to a GeoJSON file, streaming features in chunks
+    formatted straight from the column and geometry arrays rather than
+    through GDAL's GeoJSON driver. With the default precision the output is
+    the same as the driver's. In RFC 7946 mode the frame is reprojected to
+    WGS 84 if needed, no crs member is written and the default precision
+    is 7 decimal places as for the driver's RFC7946 option.
+
+    Args:
+        geo_df (GeoDataFrame): GeoDataFrame to write
+        path (str): Path to output file
+        precision (Optional[int]): Decimal places of coordinates. Defaults to None (15 or 7 in RFC 7946 mode).
+        rfc7946 (bool): Whether to write RFC 7946 GeoJSON. Defaults to False.
+        chunksize (int): Number of features to write at a time. Defaults to 10000.
+
+    Returns:
+        None
+    """
+    if precision is None:
+        precision = _RFC7946_PRECISION if rfc7946 else _OGR_PRECISION
+    if rfc7946 and geo_df.crs and geo_df.crs.to_epsg() != 4326:
+        geo_df = geo_df.to_crs(epsg=4326)
+    name = splitext(basename(path))[0]
+    columns = [column for column in geo_df.columns if column != geo_df.geometry.name]
+    keys = [json.dumps(column, ensure_ascii=False) for column in columns]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'{{\n"type": "FeatureCollection",\n"name": {json.dumps(name)},\n')
+        if not rfc7946:
+            f.write(f'"crs": {_CRS84},\n')
+        f.write('"features": [\n')
+        for start in range(0, len(geo_df), chunksize):
+            chunk = geo_df.iloc[start : start + chunksize]
+            values = [_format_column(chunk, column) for column in columns]
+            geometries = _format_geometries(chunk.geometry.array, precision)
+            features = []
+            for i, geometry in enumerate(geometries):
+                properties = ", ".join(
+                    f"{key}: {column[i]}" for key, column in zip(keys, values)
+                )
+                features.append(
+                    f'{{ "type": "Feature", "properties": {{ {properties} }}, '
+                    f'"geometry": {geometry} }}'
+                )
+            if start:
+                f.write(",\n")
+            f.write(",\n".join(features))
+        f.write("\n]\n}\n")
+
+
+def write_geoparquet(
+    ibtracs_df: DataFrame,
+    iso_times: Series,
+    path: str,
+    row_group_size: int = 100000,
+) -> None:
+    """Write IBTrACS rows as GeoParquet points with typed columns. ISO_TIME
+    is written as UTC timestamps, rows are ordered by SID and ISO_TIME so
+    that each row group covers a narrow range of storms and a bbox covering
+    column is written so that readers can filter by storm or bounding box
+    without reading the whole file. Requires pyarrow.
+
+    Args:
+        ibtracs_df (DataFrame): IBTrACS rows
+        iso_times (Series): Parsed ISO_TIME of rows (aligned on index)
+        path (str): Path to output file
+        row_group_size (int): Maximum number of rows per row group. Defaults to 100000.
+
+    Returns:
+        None
+    """
+    points_df = ibtracs_df.assign(ISO_TIME=iso_times.loc[ibtracs_df.index])
+    points_df = points_df.sort_values(["SID", "ISO_TIME"], kind="stable")
+    points_df = GeoDataFrame(
+        points_df,
+        geometry=points_from_xy(points_df["LON"], points_df["LAT"]),
+        crs="EPSG:4326",
+    )
+    points_df.to_parquet(
+        path,
+        index=False,
+        row_group_size=row_group_size,
+        write_covering_bbox=True,
+    )
+
+
+def _compare_coordinates(
+    expected: Any, actual: Any, tolerance: float, location: str
+) -> None:
+    if isinstance(expected, (int, float)):
+        if not isinstance(actual, (int, float)) or not isclose(
+            expected, actual, rel_tol=0, abs_tol=tolerance
+        ):
+            raise ValueError(f"{location}: coordinate {actual} != {expected}")
+        return
+    if len(expected) != len(actual):
+        raise ValueError(f"{location}: {len(actual)} coordinates != {len(expected)}")
+    for expected_value, actual_value in zip(expected, actual):
+        _compare_coordinates(expected_value, actual_value, tolerance, location)
+
+
+def validate_geojson(
+    expected_path: str, actual_path: str, precision: Optional[int] = None
+) -> None:
+    """Check that a GeoJSON file is equivalent to an expected one: the same
+    features in the same order with equal properties, the same geometry
+    types and coordinates equal to within the precision of the actual file.
+    Formatting and the crs member are not compared.
+
+    Args:
+        expected_path (str): Path to expected GeoJSON
+        actual_path (str): Path to GeoJSON to check
+        precision (Optional[int]): Decimal places of actual coordinates. Defaults to None (15).
+
+    Returns:
+        None
+    """
+    if precision is None:
+        precision = _OGR_PRECISION
+    tolerance = 10**-precision
+    with open(expected_path, encoding="utf-8") as f:
+        expected = json.load(f)["features"]
+    with open(actual_path, encoding="utf-8") as f:
+        actual = json.load(f)["features"]
+    if len(expected) != len(actual):
+        raise ValueError(f"{len(actual)} features != {len(expected)}")
+    for i, (expected_feature, actual_feature) in enumerate(zip(expected, actual)):
+        location = f"Feature {i}"
+        if expected_feature["properties"] != actual_feature["properties"]:
+            raise ValueError(f"{location}: properties differ")
+        expected_geometry = expected_feature["geometry"]
+        actual_geometry = actual_feature["geometry"]
+        if expected_geometry is None or actual_geometry is None:
+            if expected_geometry != actual_geometry:
+                raise ValueError(f"{location}: geometries differ")
+            continue
+        if expected_geometry["type"] != actual_geometry["type"]:
+            raise ValueError(f"{location}: geometry types differ")
+        _compare_coordinates(
+            expected_geometry["coordinates"],
+            actual_geometry["coordinates"],
+            tolerance,
+            location,
+        )
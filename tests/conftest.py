@@ -1,9 +1,12 @@
-from os.path import join
+from os.path import exists, join
+from threading import Lock
+from time import sleep
 
 import pytest
 from hdx.api.configuration import Configuration
 from hdx.api.locations import Locations
 from hdx.data.dataset import Dataset
+from hdx.data.hdxobject import HDXError
 from hdx.data.vocabulary import Vocabulary
 from hdx.location.country import Country
 from hdx.utilities.useragent import UserAgent
@@ -39,6 +42,54 @@ def read_dataset(monkeypatch):
     monkeypatch.setattr(Dataset, "read_from_hdx", staticmethod(read_from_hdx))
 
 
+@pytest.fixture(scope="function")
+def fake_hdx(monkeypatch, read_dataset):
+    # Slow stand-in for HDX reads and creates that counts concurrent calls.
+    # Datasets in "failures" fail that many times, or always if None.
+    fixture_read = Dataset.read_from_hdx
+    lock = Lock()
+    calls = {
+        "active": 0,
+        "max_active": 0,
+        "reads": [],
+        "attempts": {},
+        "batches": set(),
+        "failures": {},
+    }
+
+    def call(dataset_name):
+        with lock:
+            calls["active"] += 1
+            calls["max_active"] = max(calls["max_active"], calls["active"])
+            attempts = calls["attempts"].get(dataset_name, 0) + 1
+            calls["attempts"][dataset_name] = attempts
+        sleep(0.05)
+        with lock:
+            calls["active"] -= 1
+        failures = calls["failures"].get(dataset_name, 0)
+        if failures is None or attempts <= failures:
+            raise HDXError("Server error")
+
+    def read_from_hdx(dataset_name):
+        with lock:
+            calls["reads"].append(dataset_name)
+        call(dataset_name)
+        if not exists(
+            join("tests", "fixtures", "input", f"dataset-{dataset_name}.json")
+        ):
+            return None
+        return fixture_read(dataset_name)
+
+    def create_in_hdx(self, **kwargs):
+        with lock:
+            calls["batches"].add(kwargs["batch"])
+        call(self["name"])
+
+    monkeypatch.setattr(Dataset, "read_from_hdx", staticmethod(read_from_hdx))
+    monkeypatch.setattr(Dataset, "create_in_hdx", create_in_hdx)
+    return calls
+
+
 @pytest.fixture(scope="session")
 def configuration(config_dir):
     UserAgent.set_global("test")
@@ -0,0 +1,168 @@
+from os import makedirs
+from os.path import exists, join
+
+from hdx.utilities.compare import assert_files_same
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.ibtracs import ibtracs as ibtracs_module
+from hdx.scraper.ibtracs.checkpoint import Checkpoint
+from hdx.scraper.ibtracs.ibtracs import Ibtracs
+
+
+class TestCheckpoint:
+    def test_resume(
+        self, configuration, read_dataset, fixtures_dir, input_dir, monkeypatch
+    ):
+        with temp_dir(
+            "Test_checkpoint",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            checkpoint_dir = join(tempdir, "checkpoint")
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+
+                def run(folder, checkpoint):
+                    makedirs(folder, exist_ok=True)
+                    ibtracs = Ibtracs(
+                        configuration, retriever, folder, checkpoint=checkpoint
+                    )
+                    ibtracs.get_data()
+                    countryiso3s = ibtracs.process_countries()
+                    assert countryiso3s == ["world", "CUB", "JAM"]
+                    countryiso3s = [
+                        countryiso3
+                        for countryiso3 in ("world", "CUB")
+                        if not checkpoint.is_published(
+                            ibtracs.get_dataset_name(countryiso3)
+                        )
+                    ]
+                    return ibtracs, ibtracs.generate_datasets(countryiso3s)
+
+                # Interrupted after publishing world and writing Cuba's files
+                checkpoint = Checkpoint(checkpoint_dir)
+                first_dir = join(tempdir, "first")
+                ibtracs, datasets = run(first_dir, checkpoint)
+                _, world = next(datasets)
+                world_filenames = ibtracs.get_resource_filenames("world")
+                checkpoint.mark_published(world["name"], world_filenames)
+                for filename in world_filenames:
+                    assert not exists(join(checkpoint_dir, "files", filename))
+                next(datasets)
+                datasets.close()
+                cub_sids = ibtracs.data["CUB"]["sids"]
+
+                def fail(*args, **kwargs):
+                    raise AssertionError("Checkpointed work was redone")
+
+                monkeypatch.setattr(ibtracs_module, "get_membership", fail)
+                monkeypatch.setattr(Ibtracs, "_write_frames", fail)
+                resumed = Checkpoint(checkpoint_dir)
+                assert resumed.batch == checkpoint.batch
+                second_dir = join(tempdir, "second")
+                ibtracs, datasets = run(second_dir, resumed)
+                assert ibtracs.data["CUB"]["sids"] == cub_sids
+                assert [dataset["name"] for _, dataset in datasets] == [
+                    "cub-ibtracs-tropical-storm-tracks"
+                ]
+                assert not exists(join(second_dir, "ibtracs_ALL_list_v04r01.csv"))
+                for filename in (
+                    "ibtracs_ALL_list_v04r01_CUB.csv",
+                    "ibtracs_ALL_list_v04r01_lines_CUB.geojson",
+                ):
+                    assert_files_same(
+                        join(fixtures_dir, filename), join(second_dir, filename)
+                    )
+
+                resumed.start({"version": "v04r02"})
+                assert not resumed.is_published(world["name"])
+                assert resumed.batch == checkpoint.batch
+                assert resumed.load_membership(ibtracs._membership_key) is None
+                resumed.clear()
+                assert not exists(checkpoint_dir)
+
+    def test_resume_changed_settings(
+        self, configuration, read_dataset, fixtures_dir, input_dir, monkeypatch
+    ):
+        with temp_dir(
+            "Test_checkpoint_changed",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            checkpoint_dir = join(tempdir, "checkpoint")
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                written = []
+                write_frames = Ibtracs._write_frames
+
+                def spy(self, countryiso3, *args):
+                    written.append(countryiso3)
+                    return write_frames(self, countryiso3, *args)
+
+                monkeypatch.setattr(Ibtracs, "_write_frames", spy)
+
+                def run(folder):
+                    makedirs(folder, exist_ok=True)
+                    checkpoint = Checkpoint(checkpoint_dir)
+                    ibtracs = Ibtracs(
+                        configuration, retriever, folder, checkpoint=checkpoint
+                    )
+                    ibtracs.get_data()
+                    ibtracs.process_countries()
+                    datasets = ibtracs.generate_datasets(
+                        [
+                            countryiso3
+                            for countryiso3 in ("world", "CUB")
+                            if not checkpoint.is_published(
+                                ibtracs.get_dataset_name(countryiso3)
+                            )
+                        ]
+                    )
+                    return checkpoint, ibtracs, datasets
+
+                # Interrupted after publishing world and writing Cuba's files
+                checkpoint, ibtracs, datasets = run(join(tempdir, "first"))
+                _, world = next(datasets)
+                checkpoint.mark_published(world["name"])
+                next(datasets)
+                datasets.close()
+                assert written == ["world", "CUB"]
+
+                # Membership is recomputed with another engine so nothing is reused
+                monkeypatch.setitem(configuration, "country_engine", "overlay")
+                written.clear()
+                second_dir = join(tempdir, "second")
+                checkpoint, ibtracs, datasets = run(second_dir)
+                assert [dataset["name"] for _, dataset in datasets] == [
+                    "ibtracs-global-tropical-storm-tracks",
+                    "cub-ibtracs-tropical-storm-tracks",
+                ]
+                assert written == ["world", "CUB"]
+
+                # Files written with other settings are not reused
+                monkeypatch.setitem(configuration, "geojson_precision", 2)
+                written.clear()
+                checkpoint, ibtracs, datasets = run(join(tempdir, "third"))
+                for _ in datasets:
+                    pass
+                assert written == ["world", "CUB"]
+                assert_files_same(
+                    join(fixtures_dir, "ibtracs_ALL_list_v04r01_CUB.csv"),
+                    join(second_dir, "ibtracs_ALL_list_v04r01_CUB.csv"),
+                )
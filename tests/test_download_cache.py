@@ -0,0 +1,84 @@
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from os import makedirs
+from os.path import join
+from shutil import copyfile
+from threading import Thread
+
+import pytest
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.ibtracs.download_cache import DownloadCache
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    statuses = []
+
+    def log_request(self, code="-", size="-"):
+        self.statuses.append(int(code))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url(input_dir, tmp_path_factory):
+    served_dir = tmp_path_factory.mktemp("served")
+    makedirs(served_dir / "csv")
+    copyfile(
+        join(input_dir, "csv-ibtracs-all-list-v04r01.csv"),
+        served_dir / "csv" / "ibtracs.ALL.list.v04r01.csv",
+    )
+    handler = partial(_Handler, directory=str(served_dir))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+
+
+class TestDownloadCache:
+    def test_download_cache(self, configuration, input_dir, base_url):
+        url = f"{base_url}csv/ibtracs.ALL.list.v04r01.csv"
+        with temp_dir(
+            "Test_download_cache",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            folder = join(tempdir, "downloads")
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=False,
+                )
+                _Handler.statuses.clear()
+                cache = DownloadCache(retriever, folder)
+                path, changed = cache.download_file(url, "v04r01")
+                assert path == join(folder, "csv-ibtracs-all-list-v04r01.csv")
+                assert changed is True
+                cache.mark_published()
+
+                cache = DownloadCache(retriever, folder)
+                path2, changed = cache.download_file(url, "v04r01")
+                assert path2 == path
+                assert changed is False
+                assert _Handler.statuses == [200, 304]
+
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                cache = DownloadCache(retriever, folder)
+                _, changed = cache.download_file(url, "v04r01")
+                assert changed is False
+                assert _Handler.statuses == [200, 304]
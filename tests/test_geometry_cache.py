@@ -0,0 +1,32 @@
+from os import listdir
+from os.path import join
+
+from hdx.utilities.path import temp_dir
+
+from hdx.scraper.ibtracs.geometry_cache import GeometryCache
+from hdx.scraper.ibtracs.ibtracs import read_global_boundary
+from hdx.scraper.ibtracs.membership import buffer_boundaries
+
+
+class TestGeometryCache:
+    def test_geometry_cache(self, input_dir):
+        boundary_path = join(input_dir, "wrl_polbnda_int_1m_uncs.geojson")
+        key = GeometryCache.get_key(boundary_path, 2000000, "ESRI:54009")
+        assert key == GeometryCache.get_key(boundary_path, 2000000.0, "ESRI:54009")
+        assert key != GeometryCache.get_key(boundary_path, 1000000, "ESRI:54009")
+        assert key != GeometryCache.get_key(boundary_path, 2000000, "EPSG:3857")
+
+        with temp_dir(
+            "Test_geometry_cache",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            cache = GeometryCache(tempdir)
+            assert cache.load(key) is None
+            countries = buffer_boundaries(read_global_boundary(boundary_path), 2000000)
+            cache.save(key, countries)
+            cached = cache.load(key)
+            assert list(cached["ISO_3"]) == ["CUB", "JAM"]
+            assert cached.geometry.geom_equals_exact(countries.geometry, 0).all()
+            cache.save("othercachekey", countries)
+            assert listdir(tempdir) == ["buffered_countries_othercachekey.gpkg"]
@@ -1,5 +1,8 @@
-from os.path import join
+from os import remove
+from os.path import exists, join
 
+import geopandas
+import pytest
 from hdx.utilities.compare import assert_files_same
 from hdx.utilities.downloader import Download
 from hdx.utilities.path import temp_dir
@@ -121,3 +124,159 @@ class TestIbtracs:
                     join(fixtures_dir, "ibtracs_ALL_list_v04r01_lines_CUB.geojson"),
                     join(tempdir, "ibtracs_ALL_list_v04r01_lines_CUB.geojson"),
                 )
+
+    def test_generate_datasets_parallel(
+        self, configuration, read_dataset, fixtures_dir, input_dir
+    ):
+        with temp_dir(
+            "Test_ibtracs_parallel",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                ibtracs = Ibtracs(configuration, retriever, tempdir)
+                ibtracs.get_data()
+                ibtracs.process_countries()
+                datasets = list(ibtracs.generate_datasets(["world", "CUB"], workers=2))
+                records = ibtracs.instrumentation.records
+                assert [record["name"] for record in records[:4]] == [
+                    "version_discovery",
+                    "download",
+                    "parse_lines",
+                    "parse_csv",
+                ]
+                serialized = {
+                    record["country"]: record["rows"]
+                    for record in records
+                    if record["name"] == "serialize"
+                }
+                assert serialized == {"world": 10088, "CUB": 163}
+                assert [dataset["name"] for _, dataset in datasets] == [
+                    "ibtracs-global-tropical-storm-tracks",
+                    "cub-ibtracs-tropical-storm-tracks",
+                ]
+                for filename in (
+                    "ibtracs_ALL_list_v04r01.csv",
+                    "ibtracs_ALL_list_v04r01_lines.geojson",
+                    "ibtracs_ALL_list_v04r01_CUB.csv",
+                    "ibtracs_ALL_list_v04r01_lines_CUB.geojson",
+                ):
+                    assert_files_same(
+                        join(fixtures_dir, filename), join(tempdir, filename)
+                    )
+
+    def test_columnar_resources(
+        self, configuration, read_dataset, input_dir, monkeypatch
+    ):
+        pytest.importorskip("pyarrow")
+        from pyarrow.parquet import ParquetFile
+
+        monkeypatch.setitem(configuration, "columnar_resources", True)
+        monkeypatch.setitem(configuration, "parquet_row_group_size", 50)
+        with temp_dir(
+            "Test_ibtracs_columnar",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                ibtracs = Ibtracs(configuration, retriever, tempdir)
+                ibtracs.get_data()
+                ibtracs.process_countries()
+                dataset = ibtracs.generate_dataset("CUB")
+                ibtracs_df, geo_df = ibtracs.get_frames("CUB")
+                resources = dataset.get_resources()
+                assert [resource["name"] for resource in resources] == [
+                    "ibtracs_ALL_list_v04r01_CUB.csv",
+                    "ibtracs_ALL_list_v04r01_lines_CUB.geojson",
+                    "ibtracs_ALL_list_v04r01_points_CUB.parquet",
+                    "ibtracs_ALL_list_v04r01_lines_CUB.fgb",
+                ]
+                assert [resource.get_format() for resource in resources[2:]] == [
+                    "geoparquet",
+                    "flatgeobuf",
+                ]
+
+                path = join(tempdir, "ibtracs_ALL_list_v04r01_points_CUB.parquet")
+                assert ParquetFile(path).metadata.num_row_groups == 4
+                points_df = geopandas.read_parquet(path)
+                assert len(points_df) == len(ibtracs_df) == 163
+                assert str(points_df["ISO_TIME"].dt.tz) == "UTC"
+                assert points_df["NUMBER"].dtype == "Int64"
+                assert points_df["SID"].is_monotonic_increasing
+                subset = geopandas.read_parquet(path, bbox=(-80, 20, -70, 25))
+                assert 0 < len(subset) < len(points_df)
+
+                path = join(tempdir, "ibtracs_ALL_list_v04r01_lines_CUB.fgb")
+                lines_df = geopandas.read_file(path)
+                assert len(lines_df) == len(geo_df)
+                subset = geopandas.read_file(path, bbox=(-80, 20, -70, 25))
+                assert 0 < len(subset) < len(lines_df)
+
+    def test_incremental(self, configuration, read_dataset, input_dir):
+        with temp_dir(
+            "Test_ibtracs_incremental",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                state_file = join(tempdir, "state.json")
+                if exists(state_file):
+                    remove(state_file)
+
+                def run(change_sid=None):
+                    ibtracs = Ibtracs(
+                        configuration,
+                        retriever,
+                        tempdir,
+                        state_file=state_file,
+                        incremental=True,
+                    )
+                    ibtracs.get_data()
+                    if change_sid:
+                        world_df = ibtracs.data["world"]["csv"]
+                        row = world_df.index[world_df["SID"] == change_sid][-1]
+                        world_df.loc[row, "WMO_WIND"] = 999
+                    countryiso3s = ibtracs.process_countries()
+                    ibtracs.save_state()
+                    return ibtracs, countryiso3s
+
+                ibtracs, countryiso3s = run()
+                assert countryiso3s == ["world", "CUB", "JAM"]
+                cub_sids = ibtracs.data["CUB"]["sids"]
+                jam_sids = ibtracs.data["JAM"]["sids"]
+
+                ibtracs, countryiso3s = run()
+                assert countryiso3s == ["world"]
+                assert ibtracs.data["CUB"]["sids"] == cub_sids
+                assert ibtracs.data["JAM"]["sids"] == jam_sids
+
+                ibtracs, countryiso3s = run(ibtracs.data["world"]["csv"]["SID"][0])
+                assert countryiso3s == ["world"]
+                ibtracs, countryiso3s = run(cub_sids[0])
+                assert countryiso3s == ["world", "CUB", "JAM"]
+                assert ibtracs.data["CUB"]["sids"] == cub_sids
+                assert ibtracs.data["JAM"]["sids"] == jam_sids
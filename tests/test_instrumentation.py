@@ -0,0 +1,52 @@
+import json
+from os import listdir
+from os.path import join
+
+import pytest
+from hdx.utilities.path import temp_dir
+
+from hdx.scraper.ibtracs.instrumentation import Instrumentation
+
+
+class TestInstrumentation:
+    def test_instrumentation(self):
+        with temp_dir(
+            "Test_instrumentation",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            profile_dir = join(tempdir, "profiles")
+            instrumentation = Instrumentation("CUB", profile_dir)
+            with instrumentation.stage("parse_csv") as record:
+                record["rows"] = 10
+            for countryiso3 in ("CUB", "JAM"):
+                with instrumentation.profile(countryiso3, "write_files"):
+                    with instrumentation.stage("join", countryiso3) as outer:
+                        with instrumentation.stage("serialize", countryiso3):
+                            data = list(range(1000000))
+                        outer["rows"] = len(data)
+            assert listdir(profile_dir) == ["profile_CUB_write_files.prof"]
+
+            records = instrumentation.records
+            assert [(r["name"], r.get("country")) for r in records] == [
+                ("parse_csv", None),
+                ("serialize", "CUB"),
+                ("join", "CUB"),
+                ("serialize", "JAM"),
+                ("join", "JAM"),
+            ]
+            assert records[0]["rows"] == 10
+            for outer, inner in ((records[2], records[1]), (records[4], records[3])):
+                assert outer["peak_rss_mb"] >= inner["peak_rss_mb"]
+                assert outer["wall_seconds"] >= inner["wall_seconds"]
+
+            path = join(tempdir, "run_report.json")
+            instrumentation.write_report(path)
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+            assert report["stages"] == records
+            assert report["totals"]["join"]["count"] == 2
+            assert report["peak_rss_mb"] >= records[2]["peak_rss_mb"]
+
+        with pytest.raises(ValueError):
+            Instrumentation(profiler="unknown")
@@ -0,0 +1,121 @@
+from os.path import join
+
+import geopandas
+import numpy
+import pytest
+import shapely
+from pandas import read_csv
+
+from hdx.scraper.ibtracs.membership import (
+    get_country_sids,
+    get_membership,
+    include_country,
+    sample_boundary,
+    subdivide,
+)
+
+
+@pytest.fixture(scope="module")
+def boundaries(input_dir):
+    lyr = geopandas.read_file(join(input_dir, "wrl_polbnda_int_1m_uncs.geojson"))
+    lyr = lyr.to_crs(crs="ESRI:54009")
+    return lyr[["ISO_3", "geometry"]]
+
+
+@pytest.fixture(scope="module")
+def geographic_points(fixtures_dir):
+    df = read_csv(
+        join(fixtures_dir, "ibtracs_ALL_list_v04r01.csv"),
+        keep_default_na=False,
+        skiprows=[1],
+    )
+    return geopandas.GeoDataFrame(
+        df[["SID"]],
+        geometry=geopandas.points_from_xy(df.LON, df.LAT),
+        crs="EPSG:4326",
+    )
+
+
+@pytest.fixture(scope="module")
+def points(geographic_points):
+    return geographic_points.to_crs(crs="ESRI:54009")
+
+
+@pytest.fixture(scope="module")
+def cub_sids(fixtures_dir):
+    df = read_csv(
+        join(fixtures_dir, "ibtracs_ALL_list_v04r01_CUB.csv"),
+        keep_default_na=False,
+        skiprows=[1],
+    )
+    return sorted(df["SID"].unique())
+
+
+class TestMembership:
+    def test_engines(self, boundaries, points, cub_sids):
+        strtree = get_membership(points, boundaries, 2000000, "strtree")
+        overlay = get_membership(points, boundaries, 2000000, "overlay")
+        assert strtree == overlay
+        distance = get_membership(points, boundaries, 2000000, "distance")
+        assert distance == strtree
+        country_sids = get_country_sids(strtree, ["CUB", "JAM"])
+        assert list(country_sids.keys()) == ["CUB", "JAM"]
+        assert country_sids["CUB"] == cub_sids
+        with pytest.raises(ValueError):
+            get_membership(points, boundaries, 2000000, "unknown")
+
+    def test_large_countries(self, points):
+        assert include_country("CUB")
+        assert not include_country("XAB")
+        assert not include_country("USA")
+        assert include_country("USA", include_large=True)
+
+        # A large country with a detailed outline next to the fixture storms
+        circle = shapely.Point(-9000000, 3500000).buffer(1500000, quad_segs=2000)
+        parts = subdivide(shapely.get_parts(circle), 256)
+        assert len(parts) > 1
+        assert max(shapely.get_num_coordinates(parts)) <= 256
+        assert shapely.union_all(parts).symmetric_difference(circle).area < 1
+        boundaries = geopandas.GeoDataFrame(
+            {"ISO_3": ["USA"]}, geometry=[circle], crs="ESRI:54009"
+        )
+        membership = get_membership(points, boundaries, 2000000, "distance")
+        assert membership
+        assert all(iso3s == {"USA"} for iso3s in membership.values())
+        assert get_membership(points, boundaries, 2000000, "strtree") == {}
+
+    def test_haversine(self, boundaries, points, geographic_points, input_dir):
+        lyr = geopandas.read_file(join(input_dir, "wrl_polbnda_int_1m_uncs.geojson"))
+        geographic = get_membership(
+            geographic_points,
+            lyr[["ISO_3", "geometry"]],
+            2000000,
+            "haversine",
+        )
+        assert geographic == get_membership(points, boundaries, 2000000, "overlay")
+
+        # A country at high latitude with storms due north of its northern edge
+        country = shapely.box(0, 69, 1, 70)
+        samples = sample_boundary(numpy.array([country]), 10000)
+        steps = numpy.hypot(*numpy.diff(samples, axis=0).T)
+        assert steps.max() <= numpy.degrees(10000 / 6371008.8)
+        boundaries = geopandas.GeoDataFrame(
+            {"ISO_3": ["NOR"]}, geometry=[country], crs="EPSG:4326"
+        )
+        degrees = numpy.degrees(numpy.array([1990000, 2010000]) / 6371008.8)
+        points = geopandas.GeoDataFrame(
+            {"SID": ["near", "far", "inside"]},
+            geometry=geopandas.points_from_xy(
+                [0.5, 0.5, 0.5], [70 + degrees[0], 70 + degrees[1], 69.5]
+            ),
+            crs="EPSG:4326",
+        )
+        membership = get_membership(points, boundaries, 2000000, "haversine")
+        assert membership == {"near": {"NOR"}, "inside": {"NOR"}}
+        projected = get_membership(
+            points.to_crs(crs="ESRI:54009"),
+            boundaries.to_crs(crs="ESRI:54009"),
+            2000000,
+            "distance",
+        )
+        assert projected != membership
@@ -0,0 +1,26 @@
+from time import monotonic
+
+from hdx.scraper.ibtracs.prefetch import RateLimiter, prefetch_end_dates
+
+
+class TestPrefetch:
+    def test_prefetch_end_dates(self, configuration, fake_hdx):
+        fake_hdx["failures"]["err-ibtracs-tropical-storm-tracks"] = None
+        dataset_names = [
+            "cub-ibtracs-tropical-storm-tracks",
+            "err-ibtracs-tropical-storm-tracks",
+        ] + [f"x{i:02d}-ibtracs-tropical-storm-tracks" for i in range(10)]
+        end_dates = prefetch_end_dates(dataset_names, workers=3, calls_per_second=100)
+        assert sorted(fake_hdx["reads"]) == sorted(dataset_names)
+        assert fake_hdx["max_active"] <= 3
+        assert "err-ibtracs-tropical-storm-tracks" not in end_dates
+        assert len(end_dates) == 11
+        assert end_dates["x00-ibtracs-tropical-storm-tracks"] is None
+        assert end_dates["cub-ibtracs-tropical-storm-tracks"].year == 2024
+
+    def test_rate_limiter(self):
+        rate_limiter = RateLimiter(20)
+        start = monotonic()
+        for _ in range(5):
+            rate_limiter.wait()
+        assert monotonic() - start >= 0.19
@@ -0,0 +1,22 @@
+from pandas import DataFrame
+
+from hdx.scraper.ibtracs.storm_index import StormIndex
+
+
+class TestStormIndex:
+    def test_storm_index(self):
+        df = DataFrame(
+            {
+                "SID": ["A", "B", "A", "C", "B", "A"],
+                "VALUE": [0, 1, 2, 3, 4, 5],
+            },
+            index=[10, 11, 12, 13, 14, 15],
+        )
+        index = StormIndex(df)
+        assert len(index) == 3
+        assert list(index.get_positions(["A"])) == [0, 2, 5]
+        assert list(index.get_positions(["B", "A", "D"])) == [0, 1, 2, 4, 5]
+        assert list(index.get_positions(["D"])) == []
+        subset = index.take(df, ["C", "B"])
+        assert list(subset["VALUE"]) == [1, 3, 4]
+        assert list(subset.index) == [11, 13, 14]
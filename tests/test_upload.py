@@ -0,0 +1,182 @@
+import json
+from os import makedirs
+from os.path import exists, join
+from shutil import copyfile
+from time import sleep
+
+import pytest
+from hdx.api.configuration import Configuration
+from hdx.data.dataset import Dataset
+from hdx.data.hdxobject import HDXError
+from hdx.data.resource import Resource
+from hdx.utilities.downloader import Download
+from hdx.utilities.file_hashing import get_size_and_hash
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.ibtracs.ibtracs import Ibtracs
+from hdx.scraper.ibtracs.upload import UploadPipeline
+
+
+def make_dataset(folder, dataset_name, contents=("a,b\n1,2\n",)):
+    dataset = Dataset({"name": dataset_name})
+    for i, content in enumerate(contents):
+        filename = f"{dataset_name}_{i}.csv" if i else f"{dataset_name}.csv"
+        path = join(folder, filename)
+        with open(path, "w") as f:
+            f.write(content)
+        resource = Resource({"name": filename, "description": "Test"})
+        resource.set_format("csv")
+        resource.set_file_to_upload(path)
+        dataset.add_update_resource(resource)
+    return dataset
+
+
+class TestUpload:
+    def test_upload_pipeline(self, configuration, fake_hdx):
+        with temp_dir(
+            "Test_upload",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+
+            def upload(countryiso3, dataset):
+                dataset.create_in_hdx(batch="test-batch")
+
+            dataset_names = [f"d{i:02d}" for i in range(10)]
+            pipeline = UploadPipeline(upload, workers=3, queue_size=2, retry_delay=0)
+            max_pending = 0
+            with pipeline:
+                for i, dataset_name in enumerate(dataset_names):
+                    pipeline.submit(dataset_name, make_dataset(tempdir, dataset_name))
+                    max_pending = max(max_pending, i + 1 - len(pipeline.uploaded))
+            # Backpressure bounds generated datasets not yet uploaded
+            assert 3 < max_pending <= 2 + 3
+            assert sorted(pipeline.uploaded) == dataset_names
+            assert 1 < fake_hdx["max_active"] <= 3
+            assert fake_hdx["batches"] == {"test-batch"}
+            for dataset_name in dataset_names:
+                assert not exists(join(tempdir, f"{dataset_name}.csv"))
+
+            fake_hdx["failures"].update({"flaky": 2, "broken": None})
+            pipeline = UploadPipeline(upload, retries=2, retry_delay=0.01)
+            with pytest.raises(HDXError, match="Failed to upload broken!"):
+                with pipeline:
+                    for dataset_name in ("flaky", "broken", "fine"):
+                        pipeline.submit(
+                            dataset_name, make_dataset(tempdir, dataset_name)
+                        )
+            assert sorted(pipeline.uploaded) == ["fine", "flaky"]
+            assert list(pipeline.failed) == ["broken"]
+            assert fake_hdx["attempts"]["flaky"] == 3
+            assert fake_hdx["attempts"]["broken"] == 3
+            assert exists(join(tempdir, "broken.csv"))
+            assert not exists(join(tempdir, "flaky.csv"))
+
+    def test_generation_backpressure(self, configuration, fake_hdx, input_dir):
+        with temp_dir(
+            "Test_upload_backpressure",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                folder = join(tempdir, "files")
+                makedirs(folder, exist_ok=True)
+                ibtracs = Ibtracs(configuration, retriever, folder)
+                ibtracs.get_data()
+                countryiso3s = ibtracs.process_countries()
+                assert countryiso3s == ["world", "CUB", "JAM"]
+                written = []
+
+                def upload(countryiso3, dataset):
+                    # Slow enough for unchecked writers to finish every country
+                    sleep(1)
+                    written.append(
+                        [
+                            iso3
+                            for iso3 in countryiso3s
+                            if any(
+                                exists(join(folder, filename))
+                                for filename in ibtracs.get_resource_filenames(iso3)
+                            )
+                        ]
+                    )
+
+                # Two slots: one dataset uploading and one written ahead of it
+                with UploadPipeline(upload, workers=1, queue_size=1) as pipeline:
+                    for countryiso3, dataset in ibtracs.generate_datasets(
+                        countryiso3s, 2, pipeline.reserve
+                    ):
+                        pipeline.submit(countryiso3, dataset)
+                assert written == [["world", "CUB"], ["CUB", "JAM"], ["JAM"]]
+
+    def test_unchanged_files_not_uploaded(
+        self, configuration, fixtures_dir, input_dir, monkeypatch
+    ):
+        with temp_dir(
+            "Test_upload_unchanged",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            dataset_path = join(
+                input_dir, "dataset-cub-ibtracs-tropical-storm-tracks.json"
+            )
+            with open(dataset_path) as f:
+                existing = json.load(f)
+            csv_name, geo_name = [
+                resource["name"] for resource in existing["resources"]
+            ]
+            for filename in (csv_name, geo_name):
+                copyfile(join(fixtures_dir, filename), join(tempdir, filename))
+            # HDX has the same CSV but an older GeoJSON
+            size, hash = get_size_and_hash(join(tempdir, csv_name), "csv")
+            existing["resources"][0].update({"size": size, "hash": hash})
+            existing["resources"][1]["hash"] = "older"
+            uploads = []
+
+            def call_remoteckan(self, action, data, files=None, **kwargs):
+                if action == "package_show":
+                    return json.loads(json.dumps(existing))
+                if action == "package_revise":
+                    uploads.extend(files)
+                    return {"package": existing}
+                return {}
+
+            monkeypatch.setattr(Configuration, "call_remoteckan", call_remoteckan)
+            dataset = Dataset(
+                {
+                    key: value
+                    for key, value in existing.items()
+                    if key not in ("id", "resources")
+                }
+            )
+            for filename, file_format in ((csv_name, "csv"), (geo_name, "geojson")):
+                resource = Resource({"name": filename, "description": "Test"})
+                resource.set_format(file_format)
+                resource.set_file_to_upload(join(tempdir, filename))
+                dataset.add_update_resource(resource)
+            statuses = {}
+
+            def upload(countryiso3, dataset):
+                statuses.update(
+                    dataset.create_in_hdx(
+                        remove_additional_resources=True,
+                        match_resource_order=True,
+                        updated_by_script="test",
+                        batch="6b7f1d5c-0f5e-4a3b-9c1d-2e3f4a5b6c7d",
+                    )
+                )
+
+            with UploadPipeline(upload, delete_files=False) as pipeline:
+                pipeline.submit("CUB", dataset)
+            # The library skips filestore uploads of files whose hash matches
+            assert statuses == {csv_name: 3, geo_name: 2}
+            assert uploads == ["update__resources__1__upload"]
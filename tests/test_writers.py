@@ -0,0 +1,63 @@
+from os.path import join
+
+import pytest
+from hdx.utilities.path import temp_dir
+
+from hdx.scraper.ibtracs.ingest import read_ibtracs_lines
+from hdx.scraper.ibtracs.writers import (
+    format_coordinate,
+    validate_geojson,
+    write_geojson,
+)
+
+
+@pytest.fixture(scope="module")
+def lines_df(configuration, input_dir):
+    return read_ibtracs_lines(
+        join(input_dir, "shapefile-ibtracs-all-list-v04r01-lines.zip"),
+        "IBTrACS.ALL.list.v04r01.lines.shp",
+        configuration["columns_subset"],
+        {
+            "NATURE": configuration["nature_mapping"],
+            "BASIN": configuration["basin_mapping"],
+            "SUBBASIN": configuration["subbasin_mapping"],
+        },
+    )
+
+
+class TestWriters:
+    def test_format_coordinate(self):
+        assert format_coordinate(-66.5999755859375, 15) == "-66.5999755859375"
+        assert format_coordinate(44.200000762939453, 15) == "44.200000762939453"
+        assert format_coordinate(-67.0, 15) == "-67.0"
+        assert format_coordinate(44.200000762939453, 7) == "44.2000008"
+        assert format_coordinate(10.899999618530273, 3) == "10.9"
+
+    def test_write_geojson(self, fixtures_dir, lines_df):
+        expected = join(fixtures_dir, "ibtracs_ALL_list_v04r01_lines.geojson")
+        with temp_dir(
+            "Test_write_geojson",
+            delete_on_success=True,
+            delete_on_failure=False,
+        ) as tempdir:
+            path = join(tempdir, "ibtracs_ALL_list_v04r01_lines.geojson")
+            write_geojson(lines_df, path, chunksize=1000)
+            with open(expected, encoding="utf-8") as f:
+                expected_text = f.read()
+            with open(path, encoding="utf-8") as f:
+                assert f.read() == expected_text
+
+            path = join(tempdir, "rfc7946.geojson")
+            write_geojson(lines_df, path, rfc7946=True)
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            assert '"crs"' not in text
+            assert "[ 80.3000488, 10.8999996 ]" in text
+            validate_geojson(expected, path, 7)
+            with pytest.raises(ValueError, match="coordinate"):
+                validate_geojson(expected, path)
+
+            path = join(tempdir, "cub.geojson")
+            write_geojson(lines_df[lines_df["SID"] == "1853216N26294"], path)
+            with pytest.raises(ValueError, match="features"):
+                validate_geojson(expected, path)